@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import socket
+import sys
+
+HOST = '127.0.0.1'
+PORT = 12346
+
+class ProgressionClient:
+    # Постоянное соединение с сервером сумм: много запросов без повторного подключения
+    def __init__(self, host=HOST, port=PORT):
+        self.sock = socket.create_connection((host, port))
+        self.reader = self.sock.makefile('r', encoding='utf-8', newline='\n')
+        self.writer = self.sock.makefile('w', encoding='utf-8', newline='\n')
+
+    def calculate(self, rows):
+        # Отправка пакета троек (first, ratio, count), возвращает список сумм строками
+        self.writer.write(''.join(f"{first},{ratio},{count}\n" for first, ratio, count in rows) + "\n")
+        self.writer.flush()
+
+        results = []
+        for line in self.reader:
+            line = line.strip()
+            if not line:
+                return results
+            if line.startswith("Error:"):
+                # Дочитываем ответ до пустой строки, чтобы соединение осталось пригодным
+                for rest in self.reader:
+                    if not rest.strip():
+                        break
+                raise ValueError(line[len("Error:"):].strip())
+            results.append(line)
+        raise ConnectionError("Connection closed before the end of the response")
+
+    def close(self):
+        self.reader.close()
+        self.writer.close()
+        self.sock.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Client for the progression sum service')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    args = parser.parse_args()
+
+    # Читаем строки "first,ratio,count" из stdin и отправляем их одним запросом
+    rows = [line.strip().split(',') for line in sys.stdin if line.strip() and not line.startswith('#')]
+    try:
+        client = ProgressionClient(args.host, args.port)
+    except OSError as e:
+        print(f"Error connecting to server: {e}")
+        sys.exit(1)
+
+    try:
+        for row, value in zip(rows, client.calculate(rows)):
+            print(f"{','.join(row)},{value}")
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,25 @@
+import argparse
+import csv
+import itertools
+import sys
+from fractions import Fraction
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Количество строк, обрабатываемых за один шаг потокового режима
+CHUNK_SIZE = 65536
+
+# Наибольшее количество элементов для векторизованного движка (предел int64)
+MAX_FLOAT_COUNT = 2 ** 63 - 1
+
+def check_count(count) -> None:
+    # Проверка, что количество элементов помещается в int64 векторизованного движка
+    if count > MAX_FLOAT_COUNT:
+        raise ValueError(f"count must not exceed {MAX_FLOAT_COUNT} for the float engine, got {count}")
+
 def read_value(message: str, value_type: type, positive_only: bool = False):
     # Универсальная функция для считывания значений с проверкой корректности ввода
     while True:
@@ -16,19 +38,230 @@ def calculate_sum(first: float, ratio: float, count: int) -> float:
         return first * count
     return first * (1 - ratio ** count) / (1 - ratio)
 
-def main():
+def partial_sums(first: float, ratio: float, count: int = None):
+    # Ленивый генератор частичных сумм S_1, S_2, ..., S_count за O(1) на элемент.
+    # Если count не задан, генератор бесконечный
+    total = 0
+    term = first
+    produced = 0
+    while count is None or produced < count:
+        total += term
+        yield total
+        term *= ratio
+        produced += 1
+
+def partial_sums_chunked(first: float, ratio: float, count: int, block_size: int = CHUNK_SIZE):
+    # Блочный вариант на NumPy: каждый блок фиксированного размера строится через
+    # cumprod/cumsum и продолжает предыдущий, поэтому огромные count обрабатываются лениво
+    if np is None:
+        raise RuntimeError("NumPy is required for chunked partial sums")
+    term = float(first)
+    total = 0.0
+    for start in range(0, count, block_size):
+        size = min(block_size, count - start)
+        # Члены блока: term, term*r, term*r^2, ...
+        factors = np.empty(size, dtype=np.float64)
+        factors[0] = 1.0
+        factors[1:] = ratio
+        terms = term * np.cumprod(factors)
+        block = total + np.cumsum(terms)
+        yield block
+        total = float(block[-1])
+        term = float(terms[-1]) * ratio
+
+def geometric_series(ratio, count: int, modulus: int = None):
+    # Возвращает пару (1 + r + ... + r^(count-1), r^count) методом "разделяй и властвуй":
+    # S(2k) = S(k) * (1 + r^k), S(k+1) = S(k) + r^k, поэтому нужно O(log count) шагов
+    if count == 0:
+        return 0, 1 if modulus is None else 1 % modulus
+    if count % 2 == 1:
+        series, power = geometric_series(ratio, count - 1, modulus)
+        series, power = series + power, power * ratio
+    else:
+        series, power = geometric_series(ratio, count // 2, modulus)
+        series, power = series * (1 + power), power * power
+    if modulus is not None:
+        series, power = series % modulus, power % modulus
+    return series, power
+
+def calculate_sum_exact(first, ratio, count: int) -> Fraction:
+    # Точная сумма в рациональных числах без переполнения и потери точности
+    series, _ = geometric_series(Fraction(ratio), count)
+    return Fraction(first) * series
+
+def calculate_sum_mod(first: int, ratio: int, count: int, modulus: int) -> int:
+    # Сумма по модулю: работает для count порядка 10^18, модуль не обязан быть простым
+    series, _ = geometric_series(ratio % modulus, count, modulus)
+    return first % modulus * series % modulus
+
+def calculate_sum_exact_batch(rows) -> list:
+    # Пакетный вариант точного движка для последовательности троек (first, ratio, count)
+    return [calculate_sum_exact(first, ratio, count) for first, ratio, count in rows]
+
+def calculate_sum_mod_batch(rows, modulus: int) -> list:
+    # Пакетный вариант модульного движка
+    return [calculate_sum_mod(first, ratio, count, modulus) for first, ratio, count in rows]
+
+def calculate_sum_batch(first, ratio, count):
+    # Векторизованное вычисление сумм для массивов параметров за один проход.
+    # Случай ratio == 1 обрабатывается маской, а не ветвлением в цикле
+    if np is None:
+        raise RuntimeError("NumPy is required for batch mode")
+    first = np.asarray(first, dtype=np.float64)
+    ratio = np.asarray(ratio, dtype=np.float64)
+    count = np.asarray(count, dtype=np.int64)
+
+    unit = ratio == 1
+    # Подставляем безопасный знаменатель там, где ratio == 1, чтобы не делить на ноль
+    denominator = np.where(unit, 1.0, 1.0 - ratio)
+    with np.errstate(over='ignore', invalid='ignore'):
+        general = first * (1.0 - np.power(ratio, count)) / denominator
+    return np.where(unit, first * count, general)
+
+def load_batch(path: str, engine: str = 'float'):
+    # Загрузка троек (first, ratio, count) из CSV или бинарного файла .npy
+    if engine != 'float':
+        # Точный и модульный движки читают значения из текста без округления до float
+        with open(path, newline='') as f:
+            rows = [parse_row(row, engine) for row in csv.reader(f)
+                    if row and not row[0].startswith('#')]
+        return tuple(list(column) for column in zip(*rows)) or ([], [], [])
+
+    if np is None:
+        raise RuntimeError("NumPy is required for batch mode")
+
+    if path.endswith('.npy'):
+        data = np.load(path)
+        if data.size and data[:, 2].max() > MAX_FLOAT_COUNT:
+            check_count(int(data[:, 2].max()))
+        return data[:, 0], data[:, 1], data[:, 2].astype(np.int64)
+
+    with open(path, newline='') as f:
+        rows = [row for row in csv.reader(f) if row and not row[0].startswith('#')]
+    counts = [int(row[2]) for row in rows]
+    for count in counts:
+        check_count(count)
+    first = np.array([float(row[0]) for row in rows], dtype=np.float64)
+    ratio = np.array([float(row[1]) for row in rows], dtype=np.float64)
+    count = np.array(counts, dtype=np.int64)
+    return first, ratio, count
+
+def write_rows(dst, first, ratio, count, sums) -> None:
+    # Запись строк результата (first, ratio, count, sum) в CSV
+    writer = csv.writer(dst)
+    for row in zip(first, ratio, count, sums):
+        writer.writerow(row)
+
+def save_batch(path: str, first, ratio, count, sums) -> None:
+    # Сохранение результатов в CSV или бинарный файл .npy
+    if path.endswith('.npy'):
+        np.save(path, sums)
+        return
+
+    with open(path, 'w', newline='') as f:
+        write_rows(f, first, ratio, count, sums)
+
+def run_batch(input_path: str, output_path: str, engine: str = 'float', modulus: int = None) -> bool:
+    # Пакетный режим: вычисляем все суммы из файла одним проходом выбранного движка
+    try:
+        first, ratio, count = load_batch(input_path, engine)
+        if engine == 'float':
+            if np.any(count <= 0):
+                print("Count must be positive in every row.")
+                return False
+            sums = calculate_sum_batch(first, ratio, count)
+            first, ratio, count, sums = first.tolist(), ratio.tolist(), count.tolist(), sums.tolist()
+        else:
+            sums = compute_chunk(list(zip(first, ratio, count)), engine, modulus)
+        if output_path and output_path.endswith('.npy') and engine != 'float':
+            print("Exact and modular results can only be written as CSV.")
+            return False
+        if output_path:
+            save_batch(output_path, first, ratio, count, sums)
+        else:
+            write_rows(sys.stdout, first, ratio, count, sums)
+        return True
+    except (OSError, ValueError, IndexError, OverflowError, RuntimeError) as e:
+        print(f"Error processing batch: {e}")
+        return False
+
+# Типы значений first/ratio для каждого движка
+ENGINE_TYPES = {'float': float, 'exact': Fraction, 'mod': int}
+
+def parse_row(row, engine: str = 'float'):
+    # Разбор одной строки (first, ratio, count) с проверкой корректности
+    value_type = ENGINE_TYPES[engine]
+    first, ratio, count = value_type(row[0]), value_type(row[1]), int(row[2])
+    if count <= 0:
+        raise ValueError(f"count must be positive, got {count}")
+    if engine == 'float':
+        check_count(count)
+    return first, ratio, count
+
+def compute_chunk(rows, engine: str = 'float', modulus: int = None):
+    # Вычисление сумм для одного блока строк (векторизованно, если есть NumPy)
+    if engine == 'exact':
+        return calculate_sum_exact_batch(rows)
+    if engine == 'mod':
+        return calculate_sum_mod_batch(rows, modulus)
+    if np is None:
+        return [calculate_sum(first, ratio, count) for first, ratio, count in rows]
+    first, ratio, count = zip(*rows)
+    return calculate_sum_batch(first, ratio, count).tolist()
+
+def process_stream(src, dst, chunk_size: int = CHUNK_SIZE, engine: str = 'float', modulus: int = None) -> int:
+    # Потоковая обработка: читаем блоками фиксированного размера и сразу пишем результат,
+    # поэтому расход памяти не зависит от размера входных данных
+    reader = csv.reader(line for line in src if line.strip() and not line.startswith('#'))
+    writer = csv.writer(dst)
+    processed = 0
+    while True:
+        rows = [parse_row(row, engine) for row in itertools.islice(reader, chunk_size)]
+        if not rows:
+            break
+        for (first, ratio, count), total in zip(rows, compute_chunk(rows, engine, modulus)):
+            writer.writerow((first, ratio, count, total))
+        dst.flush()
+        processed += len(rows)
+    return processed
+
+def run_stream(input_path: str, output_path: str, chunk_size: int, engine: str = 'float', modulus: int = None) -> bool:
+    # Неинтерактивный режим для файла или stdin ('-')
+    try:
+        src = sys.stdin if input_path == '-' else open(input_path, newline='')
+        dst = open(output_path, 'w', newline='') if output_path else sys.stdout
+        try:
+            processed = process_stream(src, dst, chunk_size, engine, modulus)
+        finally:
+            if src is not sys.stdin:
+                src.close()
+            if dst is not sys.stdout:
+                dst.close()
+        print(f"Processed {processed} rows", file=sys.stderr)
+        return True
+    except (OSError, ValueError, IndexError, OverflowError) as e:
+        print(f"Error processing stream: {e}", file=sys.stderr)
+        return False
+
+def console_interface(engine: str = 'float', modulus: int = None):
     print("Program for calculating sum of geometrical progression\n")
+    value_type = ENGINE_TYPES[engine]
     flag = 'y'
     while flag == 'y' or flag == 'Y':
         # Считываем первый элемент и знаменатель прогрессии
-        first = read_value("Input first element", float)
-        ratio = read_value("Input ratio", float)
+        first = read_value("Input first element", value_type)
+        ratio = read_value("Input ratio", value_type)
 
         # Считываем количество элементов (только положительные числа)
         count = read_value("Input count of progression elements", int, positive_only=True)
 
-        # Вычисляем сумму
-        sum_result = calculate_sum(first, ratio, count)
+        # Вычисляем сумму выбранным движком
+        if engine == 'exact':
+            sum_result = calculate_sum_exact(first, ratio, count)
+        elif engine == 'mod':
+            sum_result = f"{calculate_sum_mod(first, ratio, count, modulus)} (mod {modulus})"
+        else:
+            sum_result = calculate_sum(first, ratio, count)
 
         # Выводим результат
         print(f"\nSum of {count} elements of geometrical progression with {first} as the first element and {ratio} as the ratio equals: {sum_result}")
@@ -38,5 +271,39 @@ def main():
 
     print("Program terminated.\n")
 
+def main():
+    parser = argparse.ArgumentParser(description='Sum of geometrical progression')
+    parser.add_argument('--batch', metavar='FILE',
+                        help='Compute sums for (first, ratio, count) rows from CSV or .npy file')
+    parser.add_argument('--output', metavar='FILE',
+                        help='Write batch results to CSV or .npy file instead of stdout')
+    parser.add_argument('--stream', metavar='FILE',
+                        help="Process CSV rows from FILE ('-' for stdin) in fixed-size chunks")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, metavar='N',
+                        help=f'Rows per chunk in stream mode (default {CHUNK_SIZE})')
+    parser.add_argument('--engine', choices=sorted(ENGINE_TYPES), default='float',
+                        help='float: closed formula, exact: rational O(log n), mod: sum modulo --modulus')
+    parser.add_argument('--modulus', type=int, metavar='P',
+                        help='Modulus for the mod engine')
+
+    args = parser.parse_args()
+
+    if args.engine == 'mod' and (args.modulus is None or args.modulus <= 0):
+        parser.error("--engine mod requires a positive --modulus")
+
+    if args.batch:
+        if not run_batch(args.batch, args.output, args.engine, args.modulus):
+            sys.exit(1)
+
+    elif args.stream:
+        if args.chunk_size <= 0:
+            parser.error("--chunk-size must be positive")
+        if not run_stream(args.stream, args.output, args.chunk_size, args.engine, args.modulus):
+            sys.exit(1)
+
+    else:
+        # Без режима пакетной обработки запускаем интерактивный режим
+        console_interface(args.engine, args.modulus)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import logging
+import os
+import queue
+import re
+import socket
+import threading
+import time
+
+from lr1 import ENGINE_TYPES, compute_chunk, parse_row
+
+# Протокол: клиент отправляет строки "first,ratio,count", запрос завершается пустой строкой.
+# Сервер отвечает по одной сумме на строку и тоже завершает ответ пустой строкой.
+# Одно соединение может передавать любое количество запросов подряд.
+
+HOST = '127.0.0.1'
+PORT = 12346
+
+# Окно накопления запросов (секунды) и максимальный размер объединённого пакета
+BATCH_WINDOW = 0.005
+MAX_BATCH_ROWS = 65536
+
+# Настройка логирования
+def setup_logger(name):
+    # Создание директории для логов, если её нет
+    if not os.path.exists('logs'):
+        os.makedirs('logs')
+
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+
+    # Обработчик для вывода в файл
+    file_handler = logging.FileHandler(f'logs/{name}.log')
+    file_handler.setLevel(logging.INFO)
+
+    # Обработчик для вывода в консоль
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+
+    # Формат логов
+    formatter = logging.Formatter('%(asctime)s - %(message)s')
+    file_handler.setFormatter(formatter)
+    console_handler.setFormatter(formatter)
+
+    logger.addHandler(file_handler)
+    logger.addHandler(console_handler)
+
+    return logger
+
+logger = setup_logger('lr1_server')
+client_counter = 0
+counter_lock = threading.Lock()
+
+class PendingRequest:
+    # Запрос одного клиента, ожидающий результата от пакетного обработчика
+    def __init__(self, rows):
+        self.rows = rows
+        self.results = None
+        self.error = None
+        self.done = threading.Event()
+
+class Batcher:
+    # Объединяет одновременные запросы в общий пакет в пределах короткого окна
+    # и считает его одним векторизованным вызовом compute_chunk
+    def __init__(self, engine='float', modulus=None, window=BATCH_WINDOW, max_rows=MAX_BATCH_ROWS):
+        self.engine = engine
+        self.modulus = modulus
+        self.window = window
+        self.max_rows = max_rows
+        self.requests = queue.Queue()
+        self.batches = 0
+
+        worker = threading.Thread(target=self.run)
+        worker.daemon = True
+        worker.start()
+
+    def submit(self, rows):
+        # Ставит строки в очередь и блокируется до готовности результата
+        request = PendingRequest(rows)
+        self.requests.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.results
+
+    def collect(self):
+        # Ждём первый запрос, затем добираем остальные, пока не истечёт окно
+        pending = [self.requests.get()]
+        rows = len(pending[0].rows)
+        deadline = time.monotonic() + self.window
+        while rows < self.max_rows:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            pending.append(request)
+            rows += len(request.rows)
+        return pending
+
+    def run_single(self, request):
+        # Отдельный расчёт одного запроса после сбоя общего пакета
+        try:
+            request.results = compute_chunk(request.rows, self.engine, self.modulus)
+        except Exception as e:
+            request.error = e
+        request.done.set()
+
+    def run(self):
+        while True:
+            pending = self.collect()
+            rows = [row for request in pending for row in request.rows]
+            try:
+                results = compute_chunk(rows, self.engine, self.modulus) if rows else []
+            except Exception:
+                # Ошибка в одном запросе не должна ломать остальные: считаем их по отдельности
+                for request in pending:
+                    self.run_single(request)
+                continue
+
+            self.batches += 1
+            # Раздаём результаты обратно в исходном порядке
+            offset = 0
+            for request in pending:
+                request.results = results[offset:offset + len(request.rows)]
+                offset += len(request.rows)
+                request.done.set()
+
+def read_request(reader, engine):
+    # Чтение одного запроса до пустой строки; None означает закрытие соединения
+    rows = []
+    for line in reader:
+        line = line.strip()
+        if not line:
+            return rows
+        rows.append(parse_row(re.split(r'[,\s]+', line), engine))
+    return rows or None
+
+# Обработчик подключения клиента
+def handle_client(client_socket, addr, batcher):
+    global client_counter
+
+    with counter_lock:
+        client_counter += 1
+        client_id = client_counter
+
+    logger.info(f"Client #{client_id} connected from {addr}")
+    reader = client_socket.makefile('r', encoding='utf-8', newline='\n')
+    writer = client_socket.makefile('w', encoding='utf-8', newline='\n')
+    requests_served = 0
+
+    try:
+        while True:
+            try:
+                rows = read_request(reader, batcher.engine)
+            except (ValueError, IndexError) as e:
+                # Пропускаем остаток ошибочного запроса до пустой строки
+                for line in reader:
+                    if not line.strip():
+                        break
+                writer.write(f"Error: {e}\n\n")
+                writer.flush()
+                logger.error(f"Client #{client_id} sent invalid data: {e}")
+                continue
+
+            if rows is None:
+                break
+
+            try:
+                results = batcher.submit(rows)
+            except (ValueError, OverflowError, ZeroDivisionError) as e:
+                writer.write(f"Error: {e}\n\n")
+                writer.flush()
+                logger.error(f"Client #{client_id} request failed: {e}")
+                continue
+            writer.write(''.join(f"{value}\n" for value in results) + "\n")
+            writer.flush()
+            requests_served += 1
+    except Exception as e:
+        logger.error(f"Error handling client #{client_id}: {e}")
+    finally:
+        # Закрытие соединения
+        reader.close()
+        writer.close()
+        client_socket.close()
+        logger.info(f"Connection with client #{client_id} closed after {requests_served} requests")
+
+def main():
+    parser = argparse.ArgumentParser(description='Geometric progression sum service')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--engine', choices=sorted(ENGINE_TYPES), default='float')
+    parser.add_argument('--modulus', type=int, metavar='P',
+                        help='Modulus for the mod engine')
+    parser.add_argument('--window', type=float, default=BATCH_WINDOW,
+                        help=f'Batching window in seconds (default {BATCH_WINDOW})')
+    args = parser.parse_args()
+
+    if args.engine == 'mod' and (args.modulus is None or args.modulus <= 0):
+        parser.error("--engine mod requires a positive --modulus")
+
+    batcher = Batcher(args.engine, args.modulus, args.window)
+
+    try:
+        # Создание сокета
+        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server_socket.bind((args.host, args.port))
+
+        # Начало прослушивания
+        server_socket.listen(128)
+        logger.info(f"Server started on {args.host}:{args.port} (engine: {args.engine})")
+
+        # Бесконечный цикл обработки подключений
+        while True:
+            client_socket, addr = server_socket.accept()
+
+            # Создание потока для обработки клиента
+            client_thread = threading.Thread(target=handle_client, args=(client_socket, addr, batcher))
+            client_thread.daemon = True
+            client_thread.start()
+
+    except KeyboardInterrupt:
+        logger.info("Server is shutting down...")
+    except Exception as e:
+        logger.error(f"Server error: {e}")
+    finally:
+        # Закрытие сервера
+        if 'server_socket' in locals():
+            server_socket.close()
+        logger.info(f"Server stopped, {batcher.batches} batches computed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+import os
+import sys
+import stat
+import json
+import time
+import random
+import shutil
+import hashlib
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+import contextlib
+from datetime import datetime
+
+import lr2
+
+# Наборы данных: (число файлов, размер файла) в полном и быстром режимах
+TINY_FILES = {'full': (5000, 4096), 'quick': (300, 4096)}
+HUGE_FILES = {'full': (2, 512 * 1024 * 1024), 'quick': (2, 32 * 1024 * 1024)}
+SPARSE_FILE = {'full': 4 * 1024 * 1024 * 1024, 'quick': 256 * 1024 * 1024}
+
+# Размеры буфера, проверяемые для блочного движка
+BUFFER_SIZES = [4096, 64 * 1024, 1024 * 1024]
+
+# Блок случайных данных, из которого собираются файлы (детерминирован через seed)
+PATTERN_SIZE = 1024 * 1024
+
+def write_file(path: str, size: int, pattern: bytes) -> None:
+    # Запись файла заданного размера из повторяющегося блока
+    with open(path, 'wb') as f:
+        remaining = size
+        while remaining > 0:
+            chunk = pattern[:min(len(pattern), remaining)]
+            f.write(chunk)
+            remaining -= len(chunk)
+
+def make_datasets(base: str, mode: str, seed: int) -> dict:
+    # Создание наборов файлов: много мелких, несколько больших, разреженный файл
+    rng = random.Random(seed)
+    pattern = rng.randbytes(PATTERN_SIZE)
+    datasets = {}
+
+    tiny_dir = os.path.join(base, 'tiny')
+    os.makedirs(tiny_dir)
+    count, size = TINY_FILES[mode]
+    tiny = []
+    for i in range(count):
+        path = os.path.join(tiny_dir, f'f{i:06d}')
+        # Размеры мелких файлов равномерно распределены в диапазоне [1, size]
+        write_file(path, rng.randint(1, size), pattern[rng.randrange(PATTERN_SIZE - size):])
+        tiny.append(path)
+    datasets['tiny'] = tiny
+
+    count, size = HUGE_FILES[mode]
+    huge = []
+    for i in range(count):
+        path = os.path.join(base, f'huge{i}')
+        write_file(path, size, pattern)
+        huge.append(path)
+    datasets['huge'] = huge
+
+    # Разреженный файл: несколько участков данных по 1 MB, остальное - дыры
+    path = os.path.join(base, 'sparse')
+    size = SPARSE_FILE[mode]
+    with open(path, 'wb') as f:
+        f.truncate(size)
+        for offset in range(0, size, size // 8):
+            f.seek(offset)
+            f.write(pattern)
+    datasets['sparse'] = [path]
+    return datasets
+
+def measure(func, repeat: int, cleanup=None) -> dict:
+    # Многократный запуск с замером времени; cleanup вызывается после каждого прогона
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+        if cleanup is not None:
+            cleanup()
+    return {'min': min(times), 'median': statistics.median(times), 'runs': times}
+
+def add_result(results: list, operation: str, dataset: str, variant: str, files: list, timing: dict) -> None:
+    # Сохранение результата вместе с пропускной способностью по лучшему прогону
+    total_bytes = sum(os.path.getsize(path) for path in files)
+    result = {
+        'operation': operation,
+        'dataset': dataset,
+        'variant': variant,
+        'files': len(files),
+        'bytes': total_bytes,
+        'seconds_min': timing['min'],
+        'seconds_median': timing['median'],
+        'runs': timing['runs'],
+        'mb_per_s': total_bytes / timing['min'] / 1e6 if timing['min'] > 0 else None,
+        'files_per_s': len(files) / timing['min'] if timing['min'] > 0 else None,
+    }
+    results.append(result)
+    print(f"{operation:>18} {dataset:>7} {variant:>22}: {timing['min']:.4f} s, "
+          f"{result['mb_per_s'] or 0:.1f} MB/s, {result['files_per_s'] or 0:.0f} files/s")
+
+def bench_copy(results: list, datasets: dict, target: str, repeat: int) -> None:
+    # copy_file с каждым движком, блочный движок с разными буферами и shutil.copyfile для сравнения
+    variants = {f'engine={engine}': (lambda engine: lambda src, dst: lr2.copy_contents(src, dst, engine))(engine)
+                for engine in ['auto'] + sorted(lr2.ENGINES)}
+    variants['shutil.copyfile'] = shutil.copyfile
+
+    for name, files in datasets.items():
+        def cleanup():
+            shutil.rmtree(target, ignore_errors=True)
+            os.makedirs(target)
+
+        cleanup()
+        for variant, copy in variants.items():
+            run = lambda: [copy(path, os.path.join(target, os.path.basename(path))) for path in files]
+            add_result(results, 'copy_file', name, variant, files, measure(run, repeat, cleanup))
+
+        if name == 'sparse':
+            run = lambda: [lr2.copy_sparse(path, os.path.join(target, os.path.basename(path))) for path in files]
+            add_result(results, 'copy_file', name, 'sparse', files, measure(run, repeat, cleanup))
+
+        # Влияние размера буфера на блочный движок
+        original = lr2.BUFFER_SIZE
+        try:
+            for size in BUFFER_SIZES:
+                lr2.BUFFER_SIZE = size
+                run = lambda: [lr2.copy_contents(path, os.path.join(target, os.path.basename(path)), 'buffered')
+                               for path in files]
+                add_result(results, 'copy_file', name, f'buffered/{size}', files, measure(run, repeat, cleanup))
+        finally:
+            lr2.BUFFER_SIZE = original
+        shutil.rmtree(target, ignore_errors=True)
+
+def bench_move(results: list, datasets: dict, base: str, cross_dir: str, repeat: int) -> None:
+    # move_file внутри файловой системы (rename) и, если задан каталог, между файловыми системами
+    targets = {'same-fs': os.path.join(base, 'moved')}
+    if cross_dir:
+        targets['cross-fs'] = tempfile.mkdtemp(prefix='lr2_bench_', dir=cross_dir)
+
+    try:
+        for variant, target in targets.items():
+            os.makedirs(target, exist_ok=True)
+            for name in ('tiny', 'huge'):
+                files = datasets[name]
+                moved = [os.path.join(target, os.path.basename(path)) for path in files]
+                run = lambda: [lr2.move_contents(src, dst) for src, dst in zip(files, moved)]
+                # Возвращаем файлы на место после каждого прогона
+                restore = lambda: [lr2.move_contents(dst, src) for src, dst in zip(files, moved)]
+                add_result(results, 'move_file', name, variant, files, measure(run, repeat, restore))
+    finally:
+        for target in targets.values():
+            shutil.rmtree(target, ignore_errors=True)
+
+def bench_metadata(results: list, datasets: dict, repeat: int) -> None:
+    # get_file_info (с подавлением вывода) и change_permissions на множестве мелких файлов
+    files = datasets['tiny']
+    directory = os.path.dirname(files[0])
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull):
+            timing = measure(lambda: [lr2.get_file_info(path) for path in files], repeat)
+        add_result(results, 'get_file_info', 'tiny', 'per-file', files, timing)
+
+        timing = measure(lambda: lr2.scan_info(directory, devnull, 'jsonl', 1), repeat)
+        add_result(results, 'get_file_info', 'tiny', 'scan_info', files, timing)
+
+    modes = iter(['600', '644'] * repeat)
+    def run():
+        mode = next(modes)
+        for path in files:
+            lr2.change_permissions(path, mode)
+    add_result(results, 'change_permissions', 'tiny', 'per-file', files, measure(run, repeat))
+
+    # chmod_tree меняет права и самого каталога, поэтому режимы сохраняют бит поиска,
+    # иначе доступ к элементам каталога (и их удаление после замера) был бы запрещён
+    modes = iter([0o700, 0o755] * repeat)
+    original = stat.S_IMODE(os.stat(directory).st_mode)
+    try:
+        timing = measure(lambda: lr2.chmod_tree(directory, next(modes), 1), repeat)
+    finally:
+        os.chmod(directory, original)
+    add_result(results, 'change_permissions', 'tiny', 'chmod_tree', files, timing)
+
+def source_version() -> dict:
+    # Версия кода для сравнения результатов между ревизиями
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lr2.py')
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(path), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'lr2_sha256': digest}
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark for LR_2 file operations')
+    parser.add_argument('--dir', help='Directory for generated data (default: temporary directory)')
+    parser.add_argument('--cross-dir', help='Directory on another filesystem for cross-device move')
+    parser.add_argument('--output', default='bench_results.json', help='JSON file with results')
+    parser.add_argument('--quick', action='store_true', help='Use small datasets')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (default 3)')
+    parser.add_argument('--seed', type=int, default=2025, help='Seed for generated data (default 2025)')
+    args = parser.parse_args()
+
+    if args.repeat <= 0:
+        parser.error("--repeat must be positive")
+
+    mode = 'quick' if args.quick else 'full'
+    base = tempfile.mkdtemp(prefix='lr2_bench_', dir=args.dir)
+    results = []
+    try:
+        print(f"Generating {mode} datasets in {base}")
+        datasets = make_datasets(os.path.join(base, 'data'), mode, args.seed)
+        bench_copy(results, datasets, os.path.join(base, 'copy'), args.repeat)
+        bench_move(results, datasets, base, args.cross_dir, args.repeat)
+        bench_metadata(results, datasets, args.repeat)
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'version': source_version(),
+        'python': sys.version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': {'mode': mode, 'repeat': args.repeat, 'seed': args.seed,
+                   'buffer_sizes': BUFFER_SIZES, 'cross_dir': args.cross_dir},
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -2,64 +2,1080 @@
 import os
 import sys
 import stat
+import errno
+import time
+import threading
+import queue
+import tempfile
+import json
+import hashlib
+import mmap
+import functools
+import ctypes
+import select
+import struct
+import shutil
+import heapq
+import shlex
+import fcntl
+import sqlite3
+import urllib.parse
+import gzip
+import zlib
+import bz2
+import lzma
+from collections import deque
+import csv
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import argparse
 
 # Размер буфера для копирования файлов (4 KB)
 BUFFER_SIZE = 4096
 
-def copy_file(source: str, dest: str) -> bool:
-    # Копирование файла с использованием блочного чтения/записи.
+# Размер блока сравнения при синхронизации и минимальный размер файла для поблочного обновления
+SYNC_BLOCK_SIZE = 1024 * 1024
+SYNC_DELTA_MIN_SIZE = 16 * 1024 * 1024
+
+# Размер блока и алгоритм хэширования по умолчанию для копирования с проверкой
+VERIFY_CHUNK = 1024 * 1024
+DEFAULT_HASH = 'sha256'
+# Алгоритмы с фиксированной длиной хэша (shake_* требуют указания длины)
+HASH_ALGORITHMS = sorted(name for name in hashlib.algorithms_guaranteed if not name.startswith('shake'))
+
+# Период записи контрольной точки и суффикс файла контрольной точки для возобновляемого копирования
+CHECKPOINT_INTERVAL = 256 * 1024 * 1024
+CHECKPOINT_SUFFIX = '.checkpoint'
+
+# Размер начального фрагмента для дешёвой предварительной проверки при дедупликации
+DEDUP_PREFIX = 64 * 1024
+# ioctl FICLONE из <linux/fs.h>: reflink-копия файла на файловых системах с CoW (btrfs, xfs)
+FICLONE = 0x40049409
+
+# Размер независимо сжимаемого блока
+COMPRESS_CHUNK = 4 * 1024 * 1024
+
+# Кодеки сжатия: функция сжатия блока, функция открытия сжатого потока, сигнатура, уровень по умолчанию.
+# Каждый блок сжимается в отдельный поток (member) стандартного формата, а склейка таких потоков
+# корректно распаковывается gunzip/bunzip2/xz и модулями gzip/bz2/lzma
+CODECS = {
+    'zlib': (lambda data, level: gzip.compress(data, compresslevel=level, mtime=0), gzip.open, b'\x1f\x8b', 6),
+    'bz2': (lambda data, level: bz2.compress(data, level), bz2.open, b'BZh', 9),
+    'lzma': (lambda data, level: lzma.compress(data, preset=level), lzma.open, b'\xfd7zXZ\x00', 6),
+}
+
+# Число параллельных потоков для операций над деревьями каталогов
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Максимальный объём одного системного вызова copy_file_range/sendfile
+KERNEL_CHUNK = 1 << 30
+
+# Коды ошибок, означающие, что движок не поддерживается для данной пары файлов
+UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF}
+
+def copy_with_copy_file_range(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    # Копирование внутри ядра без передачи данных через пространство пользователя
+    copied = 0
+    while copied < count:
+        position = offset + copied
+        sent = os.copy_file_range(src_fd, dst_fd, min(count - copied, KERNEL_CHUNK), position, position)
+        if sent == 0:
+            break
+        copied += sent
+    return copied
+
+def copy_with_sendfile(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    # Копирование через sendfile: запись идёт с текущей позиции целевого файла
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    copied = 0
+    while copied < count:
+        sent = os.sendfile(dst_fd, src_fd, offset + copied, min(count - copied, KERNEL_CHUNK))
+        if sent == 0:
+            break
+        copied += sent
+    return copied
+
+def copy_with_buffer(src_fd: int, dst_fd: int, offset: int, count) -> int:
+    # Классическое блочное копирование через буфер BUFFER_SIZE.
+    # count=None означает копирование до конца файла
+    copied = 0
+    while count is None or copied < count:
+        size = BUFFER_SIZE if count is None else min(BUFFER_SIZE, count - copied)
+        # Читаем блок данных
+        buffer = os.pread(src_fd, size, offset + copied)
+        if not buffer:
+            break
+        # Записываем блок в целевой файл (с учётом неполной записи)
+        view = memoryview(buffer)
+        while view:
+            written = os.pwrite(dst_fd, view, offset + copied)
+            view = view[written:]
+            copied += written
+    return copied
+
+# Границы размера блока адаптивного копирования
+ADAPTIVE_MIN_CHUNK = 64 * 1024
+ADAPTIVE_MAX_CHUNK = 16 * 1024 * 1024
+# Количество блоков, по которым измеряется скорость при каждом размере блока
+ADAPTIVE_PROBE_CHUNKS = 8
+# Минимальный прирост скорости, при котором блок ещё увеличивается
+ADAPTIVE_GAIN = 1.05
+
+def initial_chunk_size(block_size: int, file_size: int) -> int:
+    # Начальный размер блока: кратен st_blksize и не больше самого файла
+    chunk = max(ADAPTIVE_MIN_CHUNK, block_size)
+    chunk -= chunk % block_size
+    rounded_size = -(-file_size // block_size) * block_size
+    return max(block_size, min(chunk, rounded_size, ADAPTIVE_MAX_CHUNK))
+
+def copy_adaptive(src_fd: int, dst_fd: int, offset: int, count) -> int:
+    # Блочное копирование с одним заранее выделенным буфером и адаптивным размером блока:
+    # блок удваивается, пока это заметно повышает скорость. count=None - до конца файла
+    src_stat = os.fstat(src_fd)
+    block_size = src_stat.st_blksize or BUFFER_SIZE
+    file_size = src_stat.st_size - offset if count is None else count
+    chunk = initial_chunk_size(block_size, max(file_size, 1))
+
+    # Буфер выделяется один раз под максимально возможный блок и далее только переиспользуется
+    capacity = ADAPTIVE_MAX_CHUNK
+    if count is not None:
+        capacity = max(chunk, min(capacity, -(-count // block_size) * block_size))
+    buffer = bytearray(capacity)
+    view = memoryview(buffer)
+
+    copied = 0
+    best_rate = 0.0
+    adapting = True
+    probe_bytes = 0
+    probe_chunks = 0
+    probe_start = time.perf_counter()
+    while count is None or copied < count:
+        size = chunk if count is None else min(chunk, count - copied)
+        # Чтение прямо в буфер без создания нового объекта bytes
+        read = os.preadv(src_fd, [view[:size]], offset + copied)
+        if read == 0:
+            break
+        data = view[:read]
+        while data:
+            written = os.pwrite(dst_fd, data, offset + copied)
+            data = data[written:]
+            copied += written
+
+        if adapting:
+            probe_bytes += read
+            probe_chunks += 1
+            if probe_chunks == ADAPTIVE_PROBE_CHUNKS:
+                rate = probe_bytes / max(time.perf_counter() - probe_start, 1e-9)
+                # Увеличиваем блок, пока скорость растёт; иначе фиксируем текущий размер
+                if rate > best_rate * ADAPTIVE_GAIN and chunk * 2 <= capacity:
+                    best_rate = rate
+                    chunk *= 2
+                else:
+                    adapting = False
+                probe_bytes = 0
+                probe_chunks = 0
+                probe_start = time.perf_counter()
+    return copied
+
+# Размер окна отображения для mmap-копирования (кратен ALLOCATIONGRANULARITY)
+MMAP_WINDOW = 64 * 1024 * 1024
+
+def copy_with_mmap(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    # Копирование через отображение файлов в память большими окнами.
+    # Приёмник заранее выделяется posix_fallocate, чтобы его можно было отобразить
+    if count <= 0:
+        return 0
+    end = offset + count
     try:
-        with open(source, 'rb') as src, open(dest, 'wb') as dst:
-            while True:
-                # Читаем блок данных
-                buffer = src.read(BUFFER_SIZE)
-                if not buffer:
+        os.posix_fallocate(dst_fd, offset, count)
+    except OSError as e:
+        if e.errno not in UNSUPPORTED_ERRNOS:
+            raise
+        # Файловая система не умеет выделять место - достаточно установить размер
+        if os.fstat(dst_fd).st_size < end:
+            os.ftruncate(dst_fd, end)
+
+    position = offset
+    while position < end:
+        # Смещение отображения должно быть выровнено по ALLOCATIONGRANULARITY
+        start = position - position % mmap.ALLOCATIONGRANULARITY
+        length = min(MMAP_WINDOW, end - start)
+        skip = position - start
+        with mmap.mmap(src_fd, length, prot=mmap.PROT_READ, offset=start) as src_map, \
+                mmap.mmap(dst_fd, length, offset=start) as dst_map:
+            with memoryview(src_map) as view, view[skip:length] as window:
+                dst_map[skip:length] = window
+        position = start + length
+    return count
+
+# Размер буфера и глубина кольца буферов для конвейерного копирования
+PIPELINE_CHUNK = 1024 * 1024
+RING_DEPTH = 4
+
+def copy_pipelined(src_fd: int, dst_fd: int, offset: int, count: int, ring_depth: int = RING_DEPTH) -> int:
+    # Конвейерное копирование для медленных (сетевых) хранилищ: поток чтения заполняет
+    # кольцо заранее выделенных буферов, а текущий поток параллельно записывает их,
+    # поэтому чтение и запись перекрываются во времени
+    # Для небольших файлов буферы и кольцо не больше самих данных
+    chunk = max(1, min(PIPELINE_CHUNK, count))
+    free = queue.Queue()
+    filled = queue.Queue()
+    for _ in range(max(1, min(ring_depth, -(-count // chunk)))):
+        free.put(bytearray(chunk))
+    stop = threading.Event()
+    errors = []
+
+    def reader():
+        position = offset
+        try:
+            while position < offset + count and not stop.is_set():
+                buffer = free.get()
+                if buffer is None:
+                    break
+                size = min(chunk, offset + count - position)
+                read = os.preadv(src_fd, [memoryview(buffer)[:size]], position)
+                if read == 0:
                     break
-                # Записываем блок в целевой файл
-                dst.write(buffer)
+                filled.put((buffer, read, position))
+                position += read
+        except OSError as e:
+            errors.append(e)
+        finally:
+            # Пустой элемент сообщает писателю о конце данных
+            filled.put(None)
+
+    thread = threading.Thread(target=reader)
+    thread.daemon = True
+    thread.start()
+
+    copied = 0
+    try:
+        while True:
+            item = filled.get()
+            if item is None:
+                break
+            buffer, read, position = item
+            data = memoryview(buffer)[:read]
+            while data:
+                written = os.pwrite(dst_fd, data, position)
+                data = data[written:]
+                position += written
+            copied += read
+            # Буфер возвращается в кольцо для следующего чтения
+            free.put(buffer)
+    finally:
+        stop.set()
+        free.put(None)
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    return copied
+
+# Доступные движки копирования
+ENGINES = {
+    'copy_file_range': copy_with_copy_file_range,
+    'sendfile': copy_with_sendfile,
+    'buffered': copy_with_buffer,
+    'adaptive': copy_adaptive,
+    'mmap': copy_with_mmap,
+    'pipelined': copy_pipelined,
+}
+
+# Порядок перебора движков в автоматическом режиме: от самого быстрого к универсальному
+AUTO_ENGINES = ['copy_file_range', 'sendfile', 'adaptive']
+
+# Движок, сработавший для пары файловых систем (st_dev источника, st_dev приёмника)
+engine_cache = {}
+
+def copy_fd(src_fd: int, dst_fd: int, offset: int, count: int, engine: str = 'auto',
+            ring_depth: int = RING_DEPTH) -> str:
+    # Копирование диапазона между дескрипторами. Возвращает имя использованного движка
+    if engine == 'pipelined':
+        copy_pipelined(src_fd, dst_fd, offset, count, ring_depth)
+        return engine
+    if engine != 'auto':
+        ENGINES[engine](src_fd, dst_fd, offset, count)
+        return engine
+
+    key = (os.fstat(src_fd).st_dev, os.fstat(dst_fd).st_dev)
+    candidates = AUTO_ENGINES
+    if key in engine_cache:
+        candidates = AUTO_ENGINES[AUTO_ENGINES.index(engine_cache[key]):]
+
+    for name in candidates:
+        try:
+            # Запись позиционная, поэтому после отказа движка диапазон просто копируется заново
+            ENGINES[name](src_fd, dst_fd, offset, count)
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS or name == candidates[-1]:
+                raise
+            continue
+        engine_cache[key] = name
+        return name
+
+# Размер окна, после которого скопированные страницы сбрасываются на диск и вытесняются из кэша
+CACHE_WINDOW = 64 * 1024 * 1024
+
+# Флаги sync_file_range из <fcntl.h>
+SYNC_FILE_RANGE_WAIT_BEFORE = 1
+SYNC_FILE_RANGE_WRITE = 2
+SYNC_FILE_RANGE_WAIT_AFTER = 4
+
+def load_sync_file_range():
+    # sync_file_range нет в модуле os, поэтому берём его из libc через ctypes (если доступен)
+    try:
+        func = ctypes.CDLL(None, use_errno=True).sync_file_range
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = [ctypes.c_int, ctypes.c_int64, ctypes.c_int64, ctypes.c_uint]
+    func.restype = ctypes.c_int
+    return func
+
+sync_file_range = load_sync_file_range()
+
+def flush_range(fd: int, offset: int, count: int, flags: int) -> None:
+    # Запись грязных страниц диапазона; без sync_file_range - fdatasync всего файла
+    if sync_file_range is None:
+        os.fdatasync(fd)
+    elif sync_file_range(fd, offset, count, flags) != 0:
+        error = ctypes.get_errno()
+        raise OSError(error, os.strerror(error))
+
+def drop_cached_range(src_fd: int, dst_fd: int, offset: int, count: int) -> None:
+    # Дожидаемся записи диапазона приёмника и убираем диапазоны обоих файлов из кэша
+    flush_range(dst_fd, offset, count,
+                SYNC_FILE_RANGE_WAIT_BEFORE | SYNC_FILE_RANGE_WRITE | SYNC_FILE_RANGE_WAIT_AFTER)
+    os.posix_fadvise(src_fd, offset, count, os.POSIX_FADV_DONTNEED)
+    os.posix_fadvise(dst_fd, offset, count, os.POSIX_FADV_DONTNEED)
+
+def copy_cache_friendly(src_fd: int, dst_fd: int, offset: int, count: int, engine: str = 'auto',
+                        ring_depth: int = RING_DEPTH) -> str:
+    # Копирование больших файлов без вытеснения рабочего набора из страничного кэша:
+    # чтение объявляется последовательным, окна копируются по очереди, запись окна
+    # запускается асинхронно, а предыдущее окно дожидается записи и удаляется из кэша
+    os.posix_fadvise(src_fd, offset, count, os.POSIX_FADV_SEQUENTIAL)
+    used = engine
+    previous = None
+    position = offset
+    while position < offset + count:
+        size = min(CACHE_WINDOW, offset + count - position)
+        used = copy_fd(src_fd, dst_fd, position, size, engine, ring_depth)
+        flush_range(dst_fd, position, size, SYNC_FILE_RANGE_WRITE)
+        if previous is not None:
+            drop_cached_range(src_fd, dst_fd, *previous)
+        previous = (position, size)
+        position += size
+    if previous is not None:
+        drop_cached_range(src_fd, dst_fd, *previous)
+    return used
+
+def break_hard_link(path: str) -> bool:
+    # Удаление приёмника, у которого есть другие жёсткие ссылки (например, после дедупликации):
+    # запись на месте изменила бы и остальные пути с тем же inode. Возвращает True, если файл удалён
+    try:
+        path_stat = os.lstat(path)
+    except FileNotFoundError:
+        return False
+    if stat.S_ISREG(path_stat.st_mode) and path_stat.st_nlink > 1:
+        os.remove(path)
         return True
-    except IOError as e:
+    return False
+
+def copy_contents(source: str, dest: str, engine: str = 'auto', cache_friendly: bool = False,
+                  ring_depth: int = RING_DEPTH) -> str:
+    # Копирование содержимого файла. Возвращает имя движка, ошибки передаются вызывающему
+    break_hard_link(dest)
+    with open(source, 'rb') as src, open(dest, 'w+b') as dst:
+        src_stat = os.fstat(src.fileno())
+        # Для специальных файлов и файлов с нулевым размером (например, /proc) читаем до EOF
+        if not stat.S_ISREG(src_stat.st_mode) or src_stat.st_size == 0:
+            copy_with_buffer(src.fileno(), dst.fileno(), 0, None)
+            return 'buffered'
+        if cache_friendly:
+            return copy_cache_friendly(src.fileno(), dst.fileno(), 0, src_stat.st_size, engine, ring_depth)
+        return copy_fd(src.fileno(), dst.fileno(), 0, src_stat.st_size, engine, ring_depth)
+
+def data_extents(fd: int, size: int):
+    # Генератор участков с данными (start, end) по SEEK_DATA/SEEK_HOLE.
+    # Если файловая система их не поддерживает, весь файл считается данными
+    offset = 0
+    while offset < size:
+        try:
+            start = os.lseek(fd, offset, os.SEEK_DATA)
+        except OSError as e:
+            if e.errno == errno.ENXIO:
+                # Дальше до конца файла только дыра
+                return
+            if offset == 0 and e.errno in UNSUPPORTED_ERRNOS:
+                yield 0, size
+                return
+            raise
+        end = min(os.lseek(fd, start, os.SEEK_HOLE), size)
+        yield start, end
+        offset = end
+
+def copy_sparse(source: str, dest: str, engine: str = 'auto', ring_depth: int = RING_DEPTH) -> tuple:
+    # Копирование разреженного файла: переносятся только участки с данными,
+    # дыры воссоздаются установкой размера через truncate.
+    # Возвращает (прочитано байт, логический размер)
+    break_hard_link(dest)
+    with open(source, 'rb') as src, open(dest, 'w+b') as dst:
+        size = os.fstat(src.fileno()).st_size
+        bytes_read = 0
+        for start, end in data_extents(src.fileno(), size):
+            copy_fd(src.fileno(), dst.fileno(), start, end - start, engine, ring_depth)
+            bytes_read += end - start
+        os.ftruncate(dst.fileno(), size)
+    return bytes_read, size
+
+def hash_file(path: str, algorithm: str = DEFAULT_HASH) -> str:
+    # Хэш содержимого файла с чтением в один переиспользуемый буфер
+    digest = hashlib.new(algorithm)
+    buffer = bytearray(VERIFY_CHUNK)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.hexdigest()
+
+def copy_verified(source: str, dest: str, algorithm: str = DEFAULT_HASH, read_back: bool = False) -> tuple:
+    # Копирование с вычислением хэша за тот же проход: каждый блок сначала хэшируется,
+    # затем записывается. При read_back приёмник сбрасывается на диск, убирается из кэша
+    # и перечитывается. Возвращает (хэш источника, хэш приёмника или None без read_back)
+    digest = hashlib.new(algorithm)
+    buffer = bytearray(VERIFY_CHUNK)
+    view = memoryview(buffer)
+    break_hard_link(dest)
+    with open(source, 'rb', buffering=0) as src, open(dest, 'wb', buffering=0) as dst:
+        while True:
+            read = src.readinto(buffer)
+            if not read:
+                break
+            data = view[:read]
+            digest.update(data)
+            while data:
+                data = data[dst.write(data):]
+        if read_back:
+            # Без сброса и очистки кэша повторное чтение вернуло бы только что записанные страницы
+            os.fsync(dst.fileno())
+            os.posix_fadvise(dst.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+    src_digest = digest.hexdigest()
+    dst_digest = hash_file(dest, algorithm) if read_back else None
+    return src_digest, dst_digest
+
+def write_manifest(path: str, entries) -> None:
+    # Дописывает в манифест строки в формате sha256sum: "<хэш>  <путь>",
+    # поэтому его можно проверить стандартной утилитой (sha256sum -c)
+    with open(path, 'a') as f:
+        for digest, filename in entries:
+            f.write(f"{digest}  {filename}\n")
+
+def read_checkpoint(path: str):
+    # Чтение контрольной точки; повреждённый или отсутствующий файл означает копирование с нуля
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_checkpoint(path: str, checkpoint: dict) -> None:
+    # Атомарная запись контрольной точки через временный файл
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def copy_resumable(source: str, dest: str, interval: int = CHECKPOINT_INTERVAL,
+                   algorithm: str = DEFAULT_HASH) -> tuple:
+    # Возобновляемое копирование. Каждые interval байт данные сбрасываются на диск, а в файл
+    # dest + CHECKPOINT_SUFFIX пишутся смещение и хэш скопированного префикса. При повторном
+    # запуске префикс приёмника проверяется по хэшу, и копирование продолжается с контрольной точки.
+    # Возвращает (смещение, с которого продолжено копирование, размер файла)
+    checkpoint_path = dest + CHECKPOINT_SUFFIX
+    src_stat = os.stat(source)
+    identity = {'size': src_stat.st_size, 'mtime_ns': src_stat.st_mtime_ns, 'algorithm': algorithm}
+
+    digest = hashlib.new(algorithm)
+    offset = 0
+    buffer = bytearray(VERIFY_CHUNK)
+    view = memoryview(buffer)
+
+    checkpoint = read_checkpoint(checkpoint_path)
+    if (checkpoint is not None and os.path.exists(dest)
+            and all(checkpoint.get(key) == value for key, value in identity.items())):
+        # Источник не менялся - проверяем, что префикс приёмника совпадает с записанным хэшем
+        with open(dest, 'rb', buffering=0) as dst:
+            remaining = checkpoint['offset']
+            while remaining > 0:
+                read = dst.readinto(view[:min(VERIFY_CHUNK, remaining)])
+                if not read:
+                    break
+                digest.update(view[:read])
+                remaining -= read
+        if remaining == 0 and digest.hexdigest() == checkpoint['digest']:
+            offset = checkpoint['offset']
+        else:
+            digest = hashlib.new(algorithm)
+    resumed_from = offset
+
+    if not offset:
+        break_hard_link(dest)
+    with open(source, 'rb', buffering=0) as src, open(dest, 'r+b' if offset else 'w+b', buffering=0) as dst:
+        src.seek(offset)
+        next_checkpoint = offset + interval
+        while True:
+            read = src.readinto(buffer)
+            if not read:
+                break
+            data = view[:read]
+            digest.update(data)
+            while data:
+                written = os.pwrite(dst.fileno(), data, offset)
+                data = data[written:]
+                offset += written
+
+            if offset >= next_checkpoint:
+                # Контрольная точка записывается только после того, как данные на диске
+                os.fdatasync(dst.fileno())
+                write_checkpoint(checkpoint_path, dict(identity, offset=offset, digest=digest.hexdigest()))
+                next_checkpoint = offset + interval
+        os.ftruncate(dst.fileno(), offset)
+        os.fsync(dst.fileno())
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return resumed_from, offset
+
+def compress_copy(source: str, dest: str, codec: str = 'zlib', level: int = None,
+                  workers: int = DEFAULT_WORKERS) -> tuple:
+    # Копирование со сжатием. Блоки по COMPRESS_CHUNK сжимаются независимо в пуле потоков
+    # (zlib, bz2 и lzma отпускают GIL) и записываются строго в исходном порядке.
+    # Возвращает (прочитано байт, записано байт)
+    compress, _, _, default_level = CODECS[codec]
+    level = default_level if level is None else level
+    bytes_in = bytes_out = 0
+    pending = deque()
+
+    break_hard_link(dest)
+    with open(source, 'rb') as src, open(dest, 'wb') as dst, ThreadPoolExecutor(max_workers=workers) as pool:
+        def write_next():
+            nonlocal bytes_out
+            data = pending.popleft().result()
+            dst.write(data)
+            bytes_out += len(data)
+
+        while True:
+            data = src.read(COMPRESS_CHUNK)
+            if not data:
+                break
+            bytes_in += len(data)
+            pending.append(pool.submit(compress, data, level))
+            # Ограничиваем число блоков в памяти
+            if len(pending) >= workers * 2:
+                write_next()
+        # Пустой файл тоже должен дать корректный сжатый поток
+        if bytes_in == 0:
+            pending.append(pool.submit(compress, b'', level))
+        while pending:
+            write_next()
+    return bytes_in, bytes_out
+
+def detect_codec(path: str) -> str:
+    # Определение кодека сжатого файла по сигнатуре
+    with open(path, 'rb') as f:
+        header = f.read(6)
+    for name, (_, _, magic, _) in CODECS.items():
+        if header.startswith(magic):
+            return name
+    raise ValueError(f"{path}: unknown compression format")
+
+def decompress_copy(source: str, dest: str, codec: str = None) -> tuple:
+    # Копирование с распаковкой (кодек определяется по сигнатуре, если не задан).
+    # Возвращает (прочитано байт, записано байт)
+    codec = codec or detect_codec(source)
+    opener = CODECS[codec][1]
+    bytes_out = 0
+    break_hard_link(dest)
+    with opener(source, 'rb') as src, open(dest, 'wb') as dst:
+        while True:
+            data = src.read(COMPRESS_CHUNK)
+            if not data:
+                break
+            dst.write(data)
+            bytes_out += len(data)
+    return os.stat(source).st_size, bytes_out
+
+def copy_file(source: str, dest: str, engine: str = 'auto') -> bool:
+    # Копирование файла с автоматическим выбором движка.
+    try:
+        copy_contents(source, dest, engine)
+        return True
+    except OSError as e:
         print(f"Error copying file: {e}")
         return False
 
-def move_file(source: str, dest: str) -> bool:
-    # Перемещение файла.
+def fsync_directory(path: str) -> None:
+    # Сохранение на диск записи каталога (нужно после rename)
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def move_contents(source: str, dest: str, engine: str = 'auto', ring_depth: int = RING_DEPTH) -> str:
+    # Перемещение файла. Возвращает 'rename' или имя движка копирования, ошибки передаются вызывающему.
     try:
         # Сначала пробуем просто переименовать
         os.rename(source, dest)
+        return 'rename'
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    # Между файловыми системами копируем во временный файл в каталоге назначения,
+    # один раз делаем fsync и атомарно переименовываем: после сбоя dest либо старый, либо полный
+    dest_dir = os.path.dirname(os.path.abspath(dest))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(dest)}.", suffix='.tmp', dir=dest_dir)
+    try:
+        with open(source, 'rb') as src:
+            src_stat = os.fstat(src.fileno())
+            if stat.S_ISREG(src_stat.st_mode) and src_stat.st_size > 0:
+                used = copy_fd(src.fileno(), fd, 0, src_stat.st_size, engine, ring_depth)
+            else:
+                copy_with_buffer(src.fileno(), fd, 0, None)
+                used = 'buffered'
+        # Переносим права и время модификации, как при обычном rename
+        os.fchmod(fd, stat.S_IMODE(src_stat.st_mode))
+        os.utime(fd, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+        os.fsync(fd)
+        os.close(fd)
+        fd = None
+        os.replace(tmp_path, dest)
+    except BaseException:
+        # Временный файл не должен оставаться в каталоге назначения ни при какой ошибке
+        if fd is not None:
+            os.close(fd)
+        os.unlink(tmp_path)
+        raise
+    fsync_directory(dest_dir)
+    # Источник удаляется только после того, как полная копия надёжно на месте
+    os.remove(source)
+    return used
+
+def move_file(source: str, dest: str, engine: str = 'auto', ring_depth: int = RING_DEPTH) -> bool:
+    # Перемещение файла.
+    try:
+        move_contents(source, dest, engine, ring_depth)
         return True
-    except OSError:
-        # Если не удалось, копируем и удаляем оригинал
-        if copy_file(source, dest):
+    except OSError as e:
+        print(f"Error moving file: {e}")
+        return False
+
+class TreeResult:
+    # Итоги операции над деревом каталогов (заполняется из нескольких потоков)
+    def __init__(self):
+        self.files = 0
+        self.dirs = 0
+        self.errors = []
+        self.lock = threading.Lock()
+
+    def add_file(self):
+        with self.lock:
+            self.files += 1
+
+    def add_error(self, path: str, error: Exception):
+        with self.lock:
+            self.errors.append((path, str(error)))
+
+def walk_tree(source: str, dest: str, result: TreeResult):
+    # Обход дерева через os.scandir. Каталог выдаётся раньше своего содержимого,
+    # элементы выдаются как ('dir' | 'file' | 'link', путь источника, путь назначения)
+    stack = [(source, dest)]
+    while stack:
+        src_dir, dst_dir = stack.pop()
+        yield 'dir', src_dir, dst_dir
+        try:
+            with os.scandir(src_dir) as entries:
+                for entry in entries:
+                    target = os.path.join(dst_dir, entry.name)
+                    if entry.is_symlink():
+                        yield 'link', entry.path, target
+                    elif entry.is_dir():
+                        stack.append((entry.path, target))
+                    else:
+                        yield 'file', entry.path, target
+        except OSError as e:
+            result.add_error(src_dir, e)
+
+def copy_symlink(source: str, dest: str) -> None:
+    # Символические ссылки в дереве воссоздаются, а не разыменовываются;
+    # ссылка, оставшаяся от предыдущего копирования, заменяется
+    target = os.readlink(source)
+    if os.path.lexists(dest):
+        os.remove(dest)
+    os.symlink(target, dest)
+
+def process_tree(source: str, dest: str, file_func, workers: int = DEFAULT_WORKERS,
+                 link_func=copy_symlink) -> TreeResult:
+    # Обход дерева с передачей файлов в ограниченный пул потоков.
+    # Каталоги создаются в потоке обхода, поэтому всегда существуют до копирования их файлов
+    result = TreeResult()
+    # Ограничиваем число ожидающих задач, чтобы не держать в памяти всё дерево
+    slots = threading.BoundedSemaphore(workers * 2)
+
+    def run(src_path, dst_path):
+        try:
+            file_func(src_path, dst_path)
+            result.add_file()
+        except Exception as e:
+            # Результат задачи никто не читает, поэтому любая ошибка учитывается здесь
+            result.add_error(src_path, e)
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for kind, src_path, dst_path in walk_tree(source, dest, result):
             try:
-                os.remove(source)
-                return True
+                if kind == 'dir':
+                    os.makedirs(dst_path, exist_ok=True)
+                    result.dirs += 1
+                elif kind == 'link':
+                    link_func(src_path, dst_path)
+                    result.add_file()
+                else:
+                    slots.acquire()
+                    pool.submit(run, src_path, dst_path)
             except OSError as e:
-                print(f"Error removing source file: {e}")
-                return False
-        return False
+                result.add_error(src_path, e)
+    return result
 
-def get_file_info(filename: str) -> None:
-    #Получение и вывод информации о файле.
+def copy_tree(source: str, dest: str, workers: int = DEFAULT_WORKERS, copy_func=copy_contents) -> TreeResult:
+    # Рекурсивное параллельное копирование каталога
+    return process_tree(source, dest, copy_func, workers)
+
+def move_tree(source: str, dest: str, workers: int = DEFAULT_WORKERS, engine: str = 'auto',
+              ring_depth: int = RING_DEPTH) -> TreeResult:
+    # Рекурсивное перемещение каталога: переименование, а при неудаче - параллельное
+    # копирование с удалением каждого успешно скопированного файла
     try:
-        file_stat = os.stat(filename)
+        os.rename(source, dest)
+        result = TreeResult()
+        result.dirs = 1
+        return result
+    except OSError:
+        pass
 
-        # Получаем права доступа в восьмеричном формате
-        mode = stat.S_IMODE(file_stat.st_mode)
+    def move_link(src_path, dst_path):
+        copy_symlink(src_path, dst_path)
+        os.remove(src_path)
+
+    move_func = functools.partial(move_contents, engine=engine, ring_depth=ring_depth)
+    result = process_tree(source, dest, move_func, workers, move_link)
+
+    # Удаляем опустевшие каталоги источника снизу вверх; каталоги с ошибками остаются
+    src_dirs = [path for kind, path, _ in walk_tree(source, dest, TreeResult()) if kind == 'dir']
+    for path in reversed(src_dirs):
+        try:
+            os.rmdir(path)
+        except OSError as e:
+            result.add_error(path, e)
+    return result
+
+def sync_blocks(source: str, dest: str, block_size: int = SYNC_BLOCK_SIZE) -> int:
+    # Поблочное обновление существующей копии: перезаписываются только отличающиеся блоки.
+    # Возвращает число перезаписанных байт
+    rewritten = 0
+    with open(source, 'rb') as src, open(dest, 'r+b') as dst:
+        size = os.fstat(src.fileno()).st_size
+        for offset in range(0, size, block_size):
+            block = os.pread(src.fileno(), block_size, offset)
+            if os.pread(dst.fileno(), len(block), offset) != block:
+                view = memoryview(block)
+                position = offset
+                while view:
+                    written = os.pwrite(dst.fileno(), view, position)
+                    view = view[written:]
+                    position += written
+                rewritten += len(block)
+        os.ftruncate(dst.fileno(), size)
+    return rewritten
+
+def sync_file(source: str, dest: str, block_size: int = SYNC_BLOCK_SIZE) -> tuple:
+    # Инкрементальная синхронизация одного файла на основе copy_contents.
+    # Возвращает ('unchanged' | 'updated' | 'copied', записано байт)
+    src_stat = os.stat(source)
+    try:
+        dst_stat = os.stat(dest)
+    except FileNotFoundError:
+        dst_stat = None
+
+    # Совпадают размер и время модификации - файл считается неизменным
+    if (dst_stat is not None and dst_stat.st_size == src_stat.st_size
+            and dst_stat.st_mtime_ns == src_stat.st_mtime_ns):
+        return 'unchanged', 0
+
+    # Общий с другими путями inode нельзя обновлять поблочно - копируем заново
+    if dst_stat is not None and break_hard_link(dest):
+        dst_stat = None
+
+    if (dst_stat is not None and stat.S_ISREG(dst_stat.st_mode)
+            and src_stat.st_size >= SYNC_DELTA_MIN_SIZE and dst_stat.st_size > 0):
+        status, written = 'updated', sync_blocks(source, dest, block_size)
+    else:
+        copy_contents(source, dest)
+        status, written = 'copied', src_stat.st_size
+
+    # Время модификации копируется, чтобы следующий запуск мог пропустить файл
+    os.utime(dest, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+    return status, written
+
+def sync_symlink(source: str, dest: str) -> None:
+    # Ссылка пересоздаётся только если её цель изменилась
+    target = os.readlink(source)
+    if os.path.islink(dest) and os.readlink(dest) == target:
+        return
+    if os.path.lexists(dest):
+        os.remove(dest)
+    os.symlink(target, dest)
+
+def sync_tree(source: str, dest: str, workers: int = DEFAULT_WORKERS) -> tuple:
+    # Инкрементальная синхронизация дерева. Возвращает (TreeResult, счётчики по статусам)
+    lock = threading.Lock()
+    counts = {'unchanged': 0, 'updated': 0, 'copied': 0, 'bytes': 0}
+
+    def sync_one(src_path, dst_path):
+        status, written = sync_file(src_path, dst_path)
+        with lock:
+            counts[status] += 1
+            counts['bytes'] += written
+
+    result = process_tree(source, dest, sync_one, workers, sync_symlink)
+    return result, counts
+
+def hash_prefix(path: str, algorithm: str = DEFAULT_HASH) -> str:
+    # Хэш первых DEDUP_PREFIX байт файла
+    with open(path, 'rb') as f:
+        return hashlib.new(algorithm, f.read(DEDUP_PREFIX)).hexdigest()
+
+def clone_file(source: str, dest: str) -> None:
+    # reflink-копия: блоки данных общие, пока один из файлов не изменится
+    with open(source, 'rb') as src, open(dest, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+class DedupIndex:
+    # Индекс уже записанных файлов по содержимому: размер -> хэш начала -> полный хэш -> путь копии.
+    # Каждый уровень - словарь, поэтому поиск стоит O(1) обращений. Пока на уровне один файл,
+    # он хранится как (источник, приёмник) без хэша: хэш считается, только когда появится второй
+    def __init__(self, algorithm: str = DEFAULT_HASH):
+        self.algorithm = algorithm
+        self.by_size = {}
+        self.prefix_hashes = {}
+        self.full_hashes = {}
+
+    def prefix(self, path: str) -> str:
+        if path not in self.prefix_hashes:
+            self.prefix_hashes[path] = hash_prefix(path, self.algorithm)
+        return self.prefix_hashes[path]
 
+    def full(self, path: str, size: int) -> str:
+        # Для файлов не длиннее префикса полный хэш совпадает с хэшем префикса
+        if size <= DEDUP_PREFIX:
+            return self.prefix(path)
+        if path not in self.full_hashes:
+            self.full_hashes[path] = hash_file(path, self.algorithm)
+        return self.full_hashes[path]
+
+    def find(self, source: str, size: int):
+        # Возвращает путь уже записанной копии с тем же содержимым или None
+        by_prefix = self.by_size.get(size)
+        if by_prefix is None:
+            return None
+        if isinstance(by_prefix, tuple):
+            written_source, written_dest = by_prefix
+            by_prefix = self.by_size[size] = {self.prefix(written_source): by_prefix}
+
+        prefix = self.prefix(source)
+        by_full = by_prefix.get(prefix)
+        if by_full is None:
+            return None
+        if isinstance(by_full, tuple):
+            written_source, written_dest = by_full
+            by_full = by_prefix[prefix] = {self.full(written_source, size): written_dest}
+        return by_full.get(self.full(source, size))
+
+    def add(self, source: str, dest: str, size: int) -> None:
+        # Вызывается после неудачного find, который уже раскрыл нужные уровни
+        by_prefix = self.by_size.get(size)
+        if by_prefix is None:
+            self.by_size[size] = (source, dest)
+            return
+        prefix = self.prefix(source)
+        by_full = by_prefix.get(prefix)
+        if by_full is None:
+            by_prefix[prefix] = (source, dest)
+            return
+        by_full[self.full(source, size)] = dest
+
+def dedup_copy_tree(source: str, dest: str, engine: str = 'auto', algorithm: str = DEFAULT_HASH,
+                    ring_depth: int = RING_DEPTH) -> tuple:
+    # Копирование дерева с дедупликацией: файл, содержимое которого уже записано в приёмник,
+    # создаётся как reflink (если поддерживается) или жёсткая ссылка на первую копию.
+    # Возвращает (TreeResult, счётчики)
+    result = TreeResult()
+    index = DedupIndex(algorithm)
+    counts = {'copied': 0, 'cloned': 0, 'linked': 0, 'bytes_saved': 0}
+
+    for kind, src_path, dst_path in walk_tree(source, dest, result):
+        try:
+            if kind == 'dir':
+                os.makedirs(dst_path, exist_ok=True)
+                result.dirs += 1
+                continue
+            if kind == 'link':
+                copy_symlink(src_path, dst_path)
+                result.add_file()
+                continue
+
+            size = os.stat(src_path).st_size
+            existing = index.find(src_path, size)
+            # При повторном запуске приёмник может быть жёсткой ссылкой на другой файл:
+            # запись поверх него испортила бы все ссылки на тот же inode
+            if os.path.lexists(dst_path):
+                os.remove(dst_path)
+            if existing is None:
+                copy_contents(src_path, dst_path, engine, ring_depth=ring_depth)
+                index.add(src_path, dst_path, size)
+                counts['copied'] += 1
+            else:
+                try:
+                    clone_file(existing, dst_path)
+                    counts['cloned'] += 1
+                except OSError:
+                    if os.path.lexists(dst_path):
+                        os.remove(dst_path)
+                    os.link(existing, dst_path)
+                    counts['linked'] += 1
+                counts['bytes_saved'] += size
+            result.add_file()
+        except OSError as e:
+            result.add_error(src_path, e)
+    return result, counts
+
+def print_tree_summary(result: TreeResult, action: str) -> None:
+    # Вывод итогов операции над деревом и ошибок по отдельным файлам
+    print(f"{action} {result.files} files, {result.dirs} directories, {len(result.errors)} errors")
+    for path, error in result.errors:
+        print(f"  {path}: {error}")
+
+def file_info_fields(filename: str, file_stat: os.stat_result) -> dict:
+    # Поля информации о файле: размер, права в восьмеричном виде, время модификации
+    return {
+        'path': filename,
+        'size': file_stat.st_size,
+        # Получаем права доступа в восьмеричном формате
+        'permissions': oct(stat.S_IMODE(file_stat.st_mode))[2:],
         # Форматируем время последней модификации
-        mtime = datetime.fromtimestamp(file_stat.st_mtime)
+        'mtime': str(datetime.fromtimestamp(file_stat.st_mtime)),
+    }
+
+def get_file_info(filename: str) -> None:
+    #Получение и вывод информации о файле.
+    try:
+        file_stat = os.stat(filename)
+        fields = file_info_fields(filename, file_stat)
 
         print(f"File: {filename}")
-        print(f"Size: {file_stat.st_size} bytes")
-        print(f"Permissions: {oct(mode)[2:]} ({stat.filemode(file_stat.st_mode)})")
-        print(f"Last modified: {mtime}")
+        print(f"Size: {fields['size']} bytes")
+        print(f"Permissions: {fields['permissions']} ({stat.filemode(file_stat.st_mode)})")
+        print(f"Last modified: {fields['mtime']}")
 
     except OSError as e:
         print(f"Error getting file information: {e}")
 
+def scan_directories(root, visit, workers: int = DEFAULT_WORKERS) -> None:
+    # Обход каталогов, начиная с root. visit(item) обрабатывает один каталог и возвращает
+    # элементы для его подкаталогов; при workers > 1 подкаталоги обрабатываются в пуле потоков
+    if workers <= 1:
+        stack = [root]
+        while stack:
+            stack.extend(visit(stack.pop()))
+        return
+
+    pending = 0
+    done = threading.Condition()
+
+    def run(item):
+        nonlocal pending
+        try:
+            for child in visit(item):
+                submit(child)
+        finally:
+            with done:
+                pending -= 1
+                done.notify_all()
+
+    def submit(item):
+        nonlocal pending
+        with done:
+            pending += 1
+        pool.submit(run, item)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        submit(root)
+        with done:
+            done.wait_for(lambda: pending == 0)
+
+# Порядок полей в выводе массового сканирования
+INFO_FIELDS = ['path', 'size', 'permissions', 'mtime']
+
+def scan_info(root: str, out, fmt: str = 'jsonl', workers: int = DEFAULT_WORKERS) -> tuple:
+    # Массовый сбор информации о файлах дерева за один потоковый проход.
+    # Используются закэшированные результаты DirEntry.stat(). Возвращает (записей, ошибок)
+    lock = threading.Lock()
+    counts = {'entries': 0, 'errors': 0}
+    if fmt == 'csv':
+        writer = csv.DictWriter(out, fieldnames=INFO_FIELDS)
+        writer.writeheader()
+        emit = writer.writerow
+    else:
+        emit = lambda fields: out.write(json.dumps(fields) + '\n')
+
+    def visit(path):
+        rows = []
+        subdirs = []
+        errors = 0
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        rows.append(file_info_fields(entry.path, entry.stat(follow_symlinks=False)))
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                    except OSError as e:
+                        errors += 1
+                        print(f"Error getting file information: {e}", file=sys.stderr)
+        except OSError as e:
+            errors += 1
+            print(f"Error scanning directory: {e}", file=sys.stderr)
+
+        # Строки каталога записываются одним блоком, чтобы потоки не перемешивали вывод
+        with lock:
+            for fields in rows:
+                emit(fields)
+            counts['entries'] += len(rows)
+            counts['errors'] += errors
+        return subdirs
+
+    scan_directories(root, visit, workers)
+    return counts['entries'], counts['errors']
+
 def change_permissions(filename: str, mode: str) -> bool:
     # Изменение прав доступа к файлу.
     try:
@@ -71,6 +1087,613 @@ def change_permissions(filename: str, mode: str) -> bool:
         print(f"Error changing file permissions: {e}")
         return False
 
+# Число самых больших файлов, выводимых для каждого поддерева
+DEFAULT_TOP = 10
+
+class SubtreeSummary:
+    # Итоги по одному поддереву: размер, занятые блоки, число файлов и каталогов,
+    # ограниченная куча из top_n самых больших файлов
+    def __init__(self, top_n: int = DEFAULT_TOP):
+        self.top_n = top_n
+        self.bytes = 0
+        self.allocated = 0
+        self.files = 0
+        self.dirs = 0
+        self.largest = []
+
+    def add_largest(self, size: int, path: str) -> None:
+        if self.top_n <= 0:
+            return
+        if len(self.largest) < self.top_n:
+            heapq.heappush(self.largest, (size, path))
+        elif size > self.largest[0][0]:
+            heapq.heappushpop(self.largest, (size, path))
+
+    def merge(self, other: 'SubtreeSummary') -> None:
+        self.bytes += other.bytes
+        self.allocated += other.allocated
+        self.files += other.files
+        self.dirs += other.dirs
+        for size, path in other.largest:
+            self.add_largest(size, path)
+
+def summarize_tree(root: str, top_n: int = DEFAULT_TOP, workers: int = DEFAULT_WORKERS) -> tuple:
+    # Сводка в стиле du по каждому элементу верхнего уровня root. Подкаталоги обходятся
+    # параллельно; жёсткие ссылки учитываются один раз по (st_dev, st_ino).
+    # Возвращает (словарь имя -> SubtreeSummary, число ошибок)
+    lock = threading.Lock()
+    summaries = {}
+    seen_inodes = set()
+    errors = 0
+
+    def visit(item):
+        nonlocal errors
+        path, bucket = item
+        local = SubtreeSummary(top_n)
+        local_by_bucket = {}
+        subdirs = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    # Для корня каждый элемент образует собственное поддерево
+                    if bucket is None:
+                        entry_bucket = entry.name
+                        target = local_by_bucket.setdefault(entry_bucket, SubtreeSummary(top_n))
+                    else:
+                        entry_bucket = bucket
+                        target = local
+                    try:
+                        entry_stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        with lock:
+                            errors += 1
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        target.dirs += 1
+                        target.allocated += entry_stat.st_blocks * 512
+                        subdirs.append((entry.path, entry_bucket))
+                        continue
+                    if entry_stat.st_nlink > 1:
+                        key = (entry_stat.st_dev, entry_stat.st_ino)
+                        with lock:
+                            if key in seen_inodes:
+                                continue
+                            seen_inodes.add(key)
+                    target.files += 1
+                    target.bytes += entry_stat.st_size
+                    target.allocated += entry_stat.st_blocks * 512
+                    target.add_largest(entry_stat.st_size, entry.path)
+        except OSError:
+            with lock:
+                errors += 1
+
+        with lock:
+            if bucket is not None:
+                local_by_bucket[bucket] = local
+            for name, summary in local_by_bucket.items():
+                summaries.setdefault(name, SubtreeSummary(top_n)).merge(summary)
+        return subdirs
+
+    scan_directories((root, None), visit, workers)
+    return summaries, errors
+
+def print_summary(summaries: dict, errors: int) -> None:
+    # Вывод сводки: поддеревья по убыванию занятого места и их самые большие файлы
+    total = SubtreeSummary(0)
+    for name, summary in sorted(summaries.items(), key=lambda item: item[1].allocated, reverse=True):
+        total.merge(summary)
+        print(f"{summary.allocated:>15} {summary.bytes:>15} {summary.files:>9} files  {name}")
+        for size, path in sorted(summary.largest, reverse=True):
+            print(f"{'':>15} {size:>15} {'':>15}  {path}")
+    print(f"{total.allocated:>15} {total.bytes:>15} {total.files:>9} files  total "
+          f"(allocated bytes, apparent bytes), {total.dirs} directories, {errors} errors")
+
+# Файл базы индекса метаданных по умолчанию
+DEFAULT_INDEX_DB = 'lr2_index.sqlite'
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mode INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    hash TEXT
+);
+CREATE INDEX IF NOT EXISTS files_parent ON files (parent);
+CREATE INDEX IF NOT EXISTS files_size ON files (size);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+"""
+
+def open_index(db_path: str, read_only: bool = False) -> sqlite3.Connection:
+    # Открытие индекса. Для чтения база открывается только на чтение и не создаётся заново
+    if read_only:
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(errno.ENOENT, "Index database not found", db_path)
+        return sqlite3.connect(f"file:{urllib.parse.quote(os.path.abspath(db_path))}?mode=ro", uri=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(INDEX_SCHEMA)
+    return conn
+
+def forget_subtree(conn: sqlite3.Connection, path: str) -> None:
+    # Удаление каталога и всего его содержимого из индекса. Запись файла с тем же путём
+    # не трогается: каталог мог быть заменён файлом, уже занесённым в индекс.
+    # Диапазон [path + '/', path + '0') охватывает все пути внутри каталога ('0' следует за '/')
+    conn.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)",
+                 (path, path + '/', path + '0'))
+    conn.execute("DELETE FROM files WHERE path >= ? AND path < ?", (path + '/', path + '0'))
+
+def index_tree(root: str, db_path: str = DEFAULT_INDEX_DB, with_hash: bool = False,
+               algorithm: str = DEFAULT_HASH, full: bool = False) -> dict:
+    # Построение или обновление индекса метаданных дерева в sqlite3. Повторно читаются только
+    # каталоги, у которых изменилось время модификации (т.е. добавлялись, удалялись или
+    # переименовывались элементы); для остальных берутся подкаталоги, уже известные индексу.
+    # Изменения содержимого и прав файлов в неизменённых каталогах при этом не обнаруживаются,
+    # для их учёта нужен полный обход (full=True)
+    counts = {'scanned': 0, 'unchanged': 0, 'files': 0, 'errors': 0}
+    conn = open_index(db_path)
+    try:
+        with conn:
+            stack = [os.path.abspath(root)]
+            while stack:
+                path = stack.pop()
+                try:
+                    dir_stat = os.stat(path)
+                except OSError:
+                    dir_stat = None
+                if dir_stat is None or not stat.S_ISDIR(dir_stat.st_mode):
+                    # Каталог исчез или заменён файлом - убираем его из индекса
+                    forget_subtree(conn, path)
+                    continue
+
+                row = conn.execute("SELECT mtime_ns FROM dirs WHERE path = ?", (path,)).fetchone()
+                if not full and row is not None and row[0] == dir_stat.st_mtime_ns:
+                    counts['unchanged'] += 1
+                    stack.extend(child for (child,) in
+                                 conn.execute("SELECT path FROM dirs WHERE parent = ?", (path,)))
+                    continue
+
+                counts['scanned'] += 1
+                known = {file_path: (size, mtime, file_hash) for file_path, size, mtime, file_hash in
+                         conn.execute("SELECT path, size, mtime, hash FROM files WHERE parent = ?", (path,))}
+                known_dirs = {child for (child,) in
+                              conn.execute("SELECT path FROM dirs WHERE parent = ?", (path,))}
+                # Пути учитываются по типу: файл, заменённый каталогом (и наоборот), должен уйти из индекса
+                seen_files = set()
+                seen_dirs = set()
+                try:
+                    with os.scandir(path) as entries:
+                        for entry in entries:
+                            if entry.is_dir(follow_symlinks=False):
+                                seen_dirs.add(entry.path)
+                                stack.append(entry.path)
+                                continue
+                            seen_files.add(entry.path)
+                            entry_stat = entry.stat(follow_symlinks=False)
+                            file_hash = None
+                            if with_hash and stat.S_ISREG(entry_stat.st_mode):
+                                previous = known.get(entry.path)
+                                if (previous is not None and previous[2] is not None
+                                        and previous[:2] == (entry_stat.st_size, entry_stat.st_mtime)):
+                                    file_hash = previous[2]
+                                else:
+                                    file_hash = hash_file(entry.path, algorithm)
+                            conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                                         (entry.path, path, entry_stat.st_size, entry_stat.st_mode,
+                                          entry_stat.st_mtime, file_hash))
+                            counts['files'] += 1
+                except OSError as e:
+                    counts['errors'] += 1
+                    print(f"Error scanning directory: {e}", file=sys.stderr)
+                    continue
+
+                # Удаляем из индекса элементы, которых больше нет на диске
+                for file_path in known.keys() - seen_files:
+                    conn.execute("DELETE FROM files WHERE path = ?", (file_path,))
+                for child in known_dirs - seen_dirs:
+                    forget_subtree(conn, child)
+                parent = os.path.dirname(path) if path != os.path.abspath(root) else None
+                conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)",
+                             (path, parent, dir_stat.st_mtime_ns))
+    finally:
+        conn.close()
+    return counts
+
+def query_index(db_path: str = DEFAULT_INDEX_DB, larger_than: int = None, world_writable: bool = False):
+    # Выборка файлов из индекса без обращения к диску, в формате file_info_fields
+    conditions = []
+    params = []
+    if larger_than is not None:
+        conditions.append("size > ?")
+        params.append(larger_than)
+    if world_writable:
+        # Права символических ссылок всегда 777, поэтому они исключаются (0o170000 - маска типа файла)
+        conditions.append("(mode & ?) != 0 AND (mode & ?) != ?")
+        params.extend([stat.S_IWOTH, 0o170000, stat.S_IFLNK])
+    query = "SELECT path, size, mode, mtime FROM files"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY size DESC"
+
+    conn = open_index(db_path, read_only=True)
+    try:
+        for path, size, mode, mtime in conn.execute(query, params):
+            yield {
+                'path': path,
+                'size': size,
+                'permissions': oct(stat.S_IMODE(mode))[2:],
+                'mtime': str(datetime.fromtimestamp(mtime)),
+            }
+    finally:
+        conn.close()
+
+def chmod_tree(root: str, mode: int, workers: int = DEFAULT_WORKERS) -> tuple:
+    # Рекурсивное изменение прав. Каждый каталог открывается один раз, а права его элементов
+    # меняются относительно дескриптора (dir_fd), без повторного разбора полного пути.
+    # Элементы, у которых права уже совпадают, пропускаются. Возвращает (изменено, пропущено, ошибки)
+    lock = threading.Lock()
+    counts = {'changed': 0, 'skipped': 0}
+    errors = []
+
+    root_stat = os.stat(root)
+    if stat.S_IMODE(root_stat.st_mode) == mode:
+        counts['skipped'] += 1
+    else:
+        os.chmod(root, mode)
+        counts['changed'] += 1
+
+    def visit(path):
+        changed = skipped = 0
+        subdirs = []
+        try:
+            dir_fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW)
+        except OSError as e:
+            with lock:
+                errors.append((path, str(e)))
+            return subdirs
+        try:
+            with os.scandir(dir_fd) as entries:
+                for entry in entries:
+                    # Права символических ссылок в Linux не используются
+                    if entry.is_symlink():
+                        continue
+                    try:
+                        if stat.S_IMODE(entry.stat(follow_symlinks=False).st_mode) == mode:
+                            skipped += 1
+                        else:
+                            os.chmod(entry.name, mode, dir_fd=dir_fd)
+                            changed += 1
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(os.path.join(path, entry.name))
+                    except OSError as e:
+                        with lock:
+                            errors.append((os.path.join(path, entry.name), str(e)))
+        except OSError as e:
+            with lock:
+                errors.append((path, str(e)))
+        finally:
+            os.close(dir_fd)
+
+        with lock:
+            counts['changed'] += changed
+            counts['skipped'] += skipped
+        return subdirs
+
+    if stat.S_ISDIR(root_stat.st_mode):
+        scan_directories(root, visit, workers)
+    return counts['changed'], counts['skipped'], errors
+
+# Маски событий inotify из <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# Заголовок события inotify: wd, mask, cookie, len
+INOTIFY_EVENT = struct.Struct('iIII')
+
+# Задержка (секунды), в течение которой события одного файла объединяются
+WATCH_DEBOUNCE = 0.5
+
+class TreeWatcher:
+    # Непрерывное зеркалирование дерева через inotify (вызовы libc через ctypes).
+    # Серии событий одного файла объединяются и применяются к зеркалу после паузы debounce
+    # через sync_file, move_file и change_permissions
+    def __init__(self, source: str, mirror: str, debounce: float = WATCH_DEBOUNCE):
+        self.source = source
+        self.mirror = mirror
+        self.debounce = debounce
+        libc = ctypes.CDLL(None, use_errno=True)
+        self.add_watch_call = libc.inotify_add_watch
+        self.add_watch_call.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        # Дескриптор наблюдения -> относительный путь каталога
+        self.watches = {}
+        # Относительный путь -> (время последнего события, изменилось ли содержимое)
+        self.pending = {}
+        # cookie -> (относительный путь, время) для незавершённых перемещений
+        self.moves = {}
+
+    def source_path(self, rel: str) -> str:
+        return os.path.join(self.source, rel)
+
+    def mirror_path(self, rel: str) -> str:
+        return os.path.join(self.mirror, rel)
+
+    def watch_directory(self, rel: str) -> None:
+        # Рекурсивная установка наблюдения за каталогом и его подкаталогами
+        stack = [rel]
+        while stack:
+            current = stack.pop()
+            wd = self.add_watch_call(self.fd, os.fsencode(self.source_path(current)), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                print(f"Error watching {self.source_path(current)}: {os.strerror(error)}")
+                continue
+            self.watches[wd] = current
+            try:
+                with os.scandir(self.source_path(current)) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(os.path.join(current, entry.name))
+            except OSError as e:
+                print(f"Error scanning directory: {e}")
+
+    def mirror_directory(self, rel: str) -> None:
+        # Новый каталог: наблюдение ставится до копирования, чтобы не пропустить изменения
+        self.watch_directory(rel)
+        result, _ = sync_tree(self.source_path(rel), self.mirror_path(rel))
+        for path, error in result.errors:
+            print(f"Error mirroring {path}: {error}")
+        print(f"Mirrored directory {rel}")
+
+    def prune_mirror(self) -> None:
+        # Удаление из зеркала путей, которых больше нет в источнике (снизу вверх)
+        for dirpath, dirnames, filenames in os.walk(self.mirror, topdown=False):
+            for name in dirnames + filenames:
+                dst = os.path.join(dirpath, name)
+                rel = os.path.relpath(dst, self.mirror)
+                if os.path.lexists(self.source_path(rel)):
+                    continue
+                if os.path.isdir(dst) and not os.path.islink(dst):
+                    shutil.rmtree(dst)
+                else:
+                    os.remove(dst)
+                print(f"Removed {rel}")
+
+    def resync(self) -> None:
+        # Полная синхронизация: наблюдение за новыми каталогами, копирование изменений
+        # и удаление того, что исчезло из источника, пока события не отслеживались
+        self.watch_directory('')
+        result, _ = sync_tree(self.source, self.mirror)
+        for path, error in result.errors:
+            print(f"Error mirroring {path}: {error}")
+        try:
+            self.prune_mirror()
+        except OSError as e:
+            print(f"Error pruning mirror: {e}")
+
+    def mark(self, rel: str, content: bool) -> None:
+        # Откладываем обработку пути; флаг изменения содержимого накапливается
+        _, changed = self.pending.get(rel, (0, False))
+        self.pending[rel] = (time.monotonic(), changed or content)
+
+    def apply(self, rel: str, content: bool) -> None:
+        # Приведение пути в зеркале к текущему состоянию источника
+        src = self.source_path(rel)
+        dst = self.mirror_path(rel)
+        try:
+            src_stat = os.lstat(src)
+        except FileNotFoundError:
+            if os.path.isdir(dst) and not os.path.islink(dst):
+                shutil.rmtree(dst)
+            elif os.path.lexists(dst):
+                os.remove(dst)
+            else:
+                return
+            print(f"Removed {rel}")
+            return
+
+        if stat.S_ISLNK(src_stat.st_mode):
+            sync_symlink(src, dst)
+            return
+        if content and stat.S_ISREG(src_stat.st_mode):
+            # sync_file переносит время модификации, поэтому повторная синхронизация пропустит файл
+            status, _ = sync_file(src, dst)
+            if status != 'unchanged':
+                print(f"{status.capitalize()} {rel}")
+        if os.path.exists(dst) and stat.S_IMODE(os.stat(dst).st_mode) != stat.S_IMODE(src_stat.st_mode):
+            if change_permissions(dst, oct(stat.S_IMODE(src_stat.st_mode))[2:]):
+                print(f"Changed permissions of {rel}")
+
+    def flush(self, force: bool = False) -> None:
+        # Применяем события, после которых прошла пауза debounce (или все при force)
+        now = time.monotonic()
+        for cookie, (rel, moved_at) in list(self.moves.items()):
+            # Перемещение без пары IN_MOVED_TO - файл ушёл за пределы дерева
+            if force or now - moved_at >= self.debounce:
+                del self.moves[cookie]
+                self.mark(rel, False)
+        for rel, (last_event, content) in list(self.pending.items()):
+            if force or now - last_event >= self.debounce:
+                del self.pending[rel]
+                try:
+                    self.apply(rel, content)
+                except OSError as e:
+                    print(f"Error mirroring {rel}: {e}")
+
+    def rename(self, old: str, new: str, is_dir: bool) -> None:
+        # Перемещение внутри дерева повторяется в зеркале без копирования данных
+        def renamed(rel):
+            if rel == old or rel.startswith(old + os.sep):
+                return new + rel[len(old):]
+            return rel
+
+        # Отложенные события переезжают вместе с путём
+        self.pending = {renamed(rel): value for rel, value in self.pending.items()}
+        if is_dir:
+            # Пути наблюдаемых подкаталогов меняются вместе с каталогом
+            self.watches = {wd: renamed(rel) for wd, rel in self.watches.items()}
+
+        if not os.path.lexists(self.mirror_path(old)):
+            # В зеркале ещё нет исходного пути (не успел скопироваться) - копируем заново
+            if is_dir:
+                self.mirror_directory(new)
+            else:
+                self.mark(new, True)
+            return
+        if move_file(self.mirror_path(old), self.mirror_path(new)):
+            print(f"Moved {old} -> {new}")
+        else:
+            self.mark(new, True)
+
+    def handle(self, wd: int, mask: int, cookie: int, name: str) -> None:
+        if mask & IN_Q_OVERFLOW:
+            # Очередь событий переполнена - полная синхронизация
+            print("Event queue overflow, resynchronizing")
+            self.resync()
+            return
+        if mask & IN_IGNORED:
+            self.watches.pop(wd, None)
+            return
+        if wd not in self.watches:
+            return
+        rel = os.path.join(self.watches[wd], name)
+        is_dir = bool(mask & IN_ISDIR)
+
+        if mask & IN_MOVED_FROM:
+            self.moves[cookie] = (rel, time.monotonic())
+        elif mask & IN_MOVED_TO and cookie in self.moves:
+            old, _ = self.moves.pop(cookie)
+            self.rename(old, rel, is_dir)
+        elif is_dir and mask & (IN_CREATE | IN_MOVED_TO):
+            self.mirror_directory(rel)
+        else:
+            self.mark(rel, bool(mask & (IN_CREATE | IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO)))
+
+    def run(self) -> None:
+        # Начальная синхронизация и цикл обработки событий
+        os.makedirs(self.mirror, exist_ok=True)
+        self.resync()
+        print(f"Watching {self.source} -> {self.mirror} (Ctrl+C to stop)")
+
+        try:
+            while True:
+                ready, _, _ = select.select([self.fd], [], [], self.debounce / 2)
+                if ready:
+                    data = os.read(self.fd, 64 * 1024)
+                    offset = 0
+                    while offset < len(data):
+                        wd, mask, cookie, length = INOTIFY_EVENT.unpack_from(data, offset)
+                        offset += INOTIFY_EVENT.size
+                        name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                        offset += length
+                        self.handle(wd, mask, cookie, name)
+                self.flush()
+        finally:
+            self.flush(force=True)
+            os.close(self.fd)
+
+def run_operation(op: str, operands: list, engine: str = 'auto', ring_depth: int = RING_DEPTH) -> dict:
+    # Выполнение одной операции из манифеста. Возвращает данные для отчёта, ошибки передаются вызывающему
+    if op == 'copy':
+        return {'engine': copy_contents(operands[0], operands[1], engine, ring_depth=ring_depth)}
+    if op == 'move':
+        return {'engine': move_contents(operands[0], operands[1], engine, ring_depth)}
+    if op == 'info':
+        return file_info_fields(operands[0], os.stat(operands[0]))
+    if op == 'chmod':
+        os.chmod(operands[0], int(operands[1], 8))
+        return {}
+    raise ValueError(f"unknown operation '{op}'")
+
+# Число аргументов каждой операции манифеста
+BATCH_OPERATIONS = {'copy': 2, 'move': 2, 'info': 1, 'chmod': 2}
+
+def parse_manifest(path: str):
+    # Разбор манифеста: одна операция на строку ("copy SRC DST", "move SRC DST",
+    # "info FILE", "chmod FILE MODE"), пустые строки и комментарии (#) пропускаются.
+    # Генерирует (номер строки, операция, аргументы, ошибка разбора)
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            try:
+                parts = shlex.split(line, comments=True)
+            except ValueError as e:
+                yield number, None, [], str(e)
+                continue
+            if not parts:
+                continue
+            op, operands = parts[0], parts[1:]
+            if BATCH_OPERATIONS.get(op) != len(operands):
+                yield number, op, operands, f"invalid operation: {line.strip()}"
+                continue
+            yield number, op, operands, None
+
+def run_batch(manifest: str, out, workers: int = DEFAULT_WORKERS, engine: str = 'auto',
+              ring_depth: int = RING_DEPTH) -> tuple:
+    # Выполнение манифеста операций в пуле потоков. Операции над одним и тем же путём
+    # выполняются в порядке манифеста: каждая ждёт предыдущие операции со своими путями.
+    # Отчёт пишется в out в формате JSON Lines. Возвращает (успешно, с ошибкой)
+    last_by_path = {}
+
+    def run(op, operands, dependencies):
+        # Пул обрабатывает задачи по порядку, поэтому зависимости уже выполняются или выполнены
+        for dependency in dependencies:
+            dependency.exception()
+        return run_operation(op, operands, engine, ring_depth)
+
+    tasks = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for number, op, operands, error in parse_manifest(manifest):
+            if error is not None:
+                tasks.append((number, op, operands, error, None))
+                continue
+            # Пути операции: для chmod последний аргумент - режим, а не путь
+            paths = {os.path.abspath(path) for path in (operands[:1] if op == 'chmod' else operands)}
+            dependencies = {last_by_path[path] for path in paths if path in last_by_path}
+            future = pool.submit(run, op, operands, dependencies)
+            for path in paths:
+                last_by_path[path] = future
+            tasks.append((number, op, operands, None, future))
+
+        # Отчёт выводится в порядке манифеста по мере завершения операций
+        succeeded = failed = 0
+        for number, op, operands, error, future in tasks:
+            record = {'line': number, 'op': op, 'args': operands}
+            if future is not None:
+                try:
+                    record['result'] = future.result()
+                except (OSError, ValueError, IndexError) as e:
+                    error = str(e)
+            record['ok'] = error is None
+            if error is None:
+                succeeded += 1
+            else:
+                record['error'] = error
+                failed += 1
+            out.write(json.dumps(record) + '\n')
+            out.flush()
+
+    out.write(json.dumps({'summary': {'total': succeeded + failed, 'succeeded': succeeded,
+                                      'failed': failed}}) + '\n')
+    return succeeded, failed
+
 def console_interface():
     # Интерактивный консольный интерфейс программы.
     while True:
@@ -128,26 +1751,264 @@ def main():
                         help='Display file information')
     parser.add_argument('--chmod', nargs=2, metavar=('FILE', 'MODE'),
                         help='Change file permissions (octal mode)')
+    parser.add_argument('--sync', nargs=2, metavar=('SOURCE', 'DEST'),
+                        help='Incrementally synchronize a file or directory tree')
+    parser.add_argument('--watch', nargs=2, metavar=('SOURCE', 'MIRROR'),
+                        help='Continuously mirror SOURCE tree into MIRROR using inotify')
+    parser.add_argument('--debounce', type=float, default=WATCH_DEBOUNCE, metavar='SECONDS',
+                        help=f'Delay for coalescing events of one file in --watch (default {WATCH_DEBOUNCE})')
+    parser.add_argument('--batch', metavar='FILE',
+                        help='Run copy/move/info/chmod operations listed in FILE, one per line')
+    parser.add_argument('--info-tree', metavar='DIR',
+                        help='Write information about every entry of a directory tree')
+    parser.add_argument('--summary', metavar='DIR',
+                        help='Summarize sizes, allocated blocks and largest files per subtree of DIR')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, metavar='N',
+                        help=f'Number of largest files shown per subtree in --summary (default {DEFAULT_TOP})')
+    parser.add_argument('--index', metavar='DIR',
+                        help='Build or incrementally refresh the sqlite metadata index of a tree')
+    parser.add_argument('--db', default=DEFAULT_INDEX_DB, metavar='FILE',
+                        help=f'Metadata index database (default {DEFAULT_INDEX_DB})')
+    parser.add_argument('--index-hash', action='store_true',
+                        help='Store content hashes (--hash) of regular files in the index')
+    parser.add_argument('--index-full', action='store_true',
+                        help='Rescan every directory, also picking up content and permission changes '
+                             'that do not change the directory mtime')
+    parser.add_argument('--larger-than', type=int, metavar='BYTES',
+                        help='Query the index for files larger than BYTES')
+    parser.add_argument('--world-writable', action='store_true',
+                        help='Query the index for world-writable files')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl',
+                        help='Output format for --info-tree and index queries (default jsonl)')
+    parser.add_argument('--output', metavar='FILE',
+                        help='Write --info-tree output or --batch report to FILE instead of stdout')
+    parser.add_argument('-r', '--recursive', action='store_true',
+                        help='Copy, move or chmod directories recursively')
+    parser.add_argument('--engine', choices=['auto'] + sorted(ENGINES), default='auto',
+                        help='Copy engine (default auto: copy_file_range, then sendfile, then adaptive)')
+    parser.add_argument('--ring-depth', type=int, default=RING_DEPTH, metavar='N',
+                        help=f'Number of buffers in the pipelined engine ring (default {RING_DEPTH})')
+    parser.add_argument('--cache-friendly', action='store_true',
+                        help='Copy without evicting the page cache (fadvise + bounded dirty pages)')
+    parser.add_argument('--dedup', action='store_true',
+                        help='With --copy -r, store files with already copied content as reflinks or hard links')
+    parser.add_argument('--compress', choices=sorted(CODECS), metavar='CODEC',
+                        help='Compress while copying with zlib (gzip), bz2 or lzma (xz) using --workers threads')
+    parser.add_argument('--decompress', action='store_true',
+                        help='Decompress a zlib/bz2/lzma file while copying')
+    parser.add_argument('--level', type=int, metavar='N',
+                        help='Compression level for --compress')
+    parser.add_argument('--sparse', action='store_true',
+                        help='Copy only allocated data ranges and preserve holes')
+    parser.add_argument('--verify', action='store_true',
+                        help='Hash data while copying and report the source digest')
+    parser.add_argument('--read-back', action='store_true',
+                        help='With --verify, flush and re-read the destination to verify its digest')
+    parser.add_argument('--hash', default=DEFAULT_HASH, choices=HASH_ALGORITHMS,
+                        metavar='ALGO', help=f'Hash algorithm for --verify (default {DEFAULT_HASH})')
+    parser.add_argument('--manifest', metavar='FILE',
+                        help='With --verify, append source and destination digests to FILE')
+    parser.add_argument('--resumable', action='store_true',
+                        help='Record checkpoints while copying and resume an interrupted copy')
+    parser.add_argument('--checkpoint-interval', type=int, default=CHECKPOINT_INTERVAL // (1024 * 1024),
+                        metavar='MB', help='Checkpoint interval for --resumable in MiB '
+                                           f'(default {CHECKPOINT_INTERVAL // (1024 * 1024)})')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, metavar='N',
+                        help=f'Number of parallel workers for tree operations (default {DEFAULT_WORKERS})')
 
     args = parser.parse_args()
 
+    if args.workers <= 0:
+        parser.error("--workers must be positive")
+    if args.top < 0:
+        parser.error("--top must not be negative")
+    if args.checkpoint_interval <= 0:
+        parser.error("--checkpoint-interval must be positive")
+    if args.ring_depth <= 0:
+        parser.error("--ring-depth must be positive")
+
     # Если нет аргументов, запускаем интерактивный режим
     if len(sys.argv) == 1:
         console_interface()
         return
 
     # Обработка аргументов командной строки
-    if args.copy:
-        if copy_file(args.copy[0], args.copy[1]):
-            print("File copied successfully")
+    if args.copy and args.recursive and args.dedup and os.path.isdir(args.copy[0]):
+        result, counts = dedup_copy_tree(args.copy[0], args.copy[1], args.engine, args.hash,
+                                         args.ring_depth)
+        print_tree_summary(result, "Copied")
+        print(f"Deduplicated: {counts['copied']} copied, {counts['cloned']} reflinked, "
+              f"{counts['linked']} hard-linked, {counts['bytes_saved']} bytes saved")
+
+    elif args.copy and args.recursive and os.path.isdir(args.copy[0]):
+        if args.sparse:
+            copy_func = functools.partial(copy_sparse, engine=args.engine, ring_depth=args.ring_depth)
+        else:
+            copy_func = functools.partial(copy_contents, engine=args.engine, cache_friendly=args.cache_friendly,
+                                          ring_depth=args.ring_depth)
+        result = copy_tree(args.copy[0], args.copy[1], args.workers, copy_func)
+        print_tree_summary(result, "Copied")
+
+    elif args.move and args.recursive and os.path.isdir(args.move[0]):
+        result = move_tree(args.move[0], args.move[1], args.workers, args.engine, args.ring_depth)
+        print_tree_summary(result, "Moved")
+
+    elif args.copy and args.verify:
+        try:
+            src_digest, dst_digest = copy_verified(args.copy[0], args.copy[1], args.hash, args.read_back)
+            entries = [(src_digest, args.copy[0])]
+            if dst_digest is not None:
+                entries.append((dst_digest, args.copy[1]))
+            if args.manifest:
+                write_manifest(args.manifest, entries)
+            print(f"Source {args.hash}: {src_digest}")
+            if dst_digest is None:
+                print("File copied successfully")
+            elif src_digest == dst_digest:
+                print(f"Destination {args.hash}: {dst_digest}")
+                print("File copied and verified successfully")
+            else:
+                print(f"Destination {args.hash}: {dst_digest}")
+                print("Error: destination digest does not match source")
+                sys.exit(1)
+        except (OSError, ValueError) as e:
+            print(f"Error copying file: {e}")
+
+    elif args.copy and (args.compress or args.decompress):
+        try:
+            if args.compress:
+                bytes_in, bytes_out = compress_copy(args.copy[0], args.copy[1], args.compress,
+                                                    args.level, args.workers)
+            else:
+                bytes_in, bytes_out = decompress_copy(args.copy[0], args.copy[1])
+            print(f"File copied successfully ({bytes_in} bytes read, {bytes_out} bytes written)")
+        except (OSError, ValueError, EOFError, lzma.LZMAError, zlib.error) as e:
+            print(f"Error copying file: {e}")
+
+    elif args.copy and args.resumable:
+        try:
+            resumed_from, size = copy_resumable(args.copy[0], args.copy[1],
+                                                args.checkpoint_interval * 1024 * 1024, args.hash)
+            if resumed_from:
+                print(f"File copied successfully (resumed at {resumed_from} of {size} bytes)")
+            else:
+                print("File copied successfully")
+        except (OSError, ValueError) as e:
+            print(f"Error copying file: {e}")
+
+    elif args.copy and args.sparse:
+        try:
+            bytes_read, size = copy_sparse(args.copy[0], args.copy[1], args.engine, args.ring_depth)
+            print(f"File copied successfully (read {bytes_read} of {size} bytes)")
+        except OSError as e:
+            print(f"Error copying file: {e}")
+
+    elif args.copy:
+        try:
+            engine = copy_contents(args.copy[0], args.copy[1], args.engine, args.cache_friendly,
+                                   args.ring_depth)
+            print(f"File copied successfully (engine: {engine})")
+        except OSError as e:
+            print(f"Error copying file: {e}")
 
     elif args.move:
-        if move_file(args.move[0], args.move[1]):
+        if move_file(args.move[0], args.move[1], args.engine, args.ring_depth):
             print("File moved successfully")
 
+    elif args.sync:
+        try:
+            if os.path.isdir(args.sync[0]):
+                result, counts = sync_tree(args.sync[0], args.sync[1], args.workers)
+            else:
+                result, counts = TreeResult(), {'unchanged': 0, 'updated': 0, 'copied': 0}
+                status, counts['bytes'] = sync_file(args.sync[0], args.sync[1])
+                counts[status] += 1
+            print(f"Synced: {counts['copied']} copied, {counts['updated']} updated, "
+                  f"{counts['unchanged']} unchanged, {counts['bytes']} bytes written")
+            for path, error in result.errors:
+                print(f"  {path}: {error}")
+        except OSError as e:
+            print(f"Error synchronizing: {e}")
+
     elif args.info:
         get_file_info(args.info)
 
+    elif args.info_tree:
+        try:
+            out = open(args.output, 'w', newline='') if args.output else sys.stdout
+            try:
+                entries, errors = scan_info(args.info_tree, out, args.format, args.workers)
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+            print(f"Scanned {entries} entries, {errors} errors", file=sys.stderr)
+        except OSError as e:
+            print(f"Error scanning tree: {e}")
+
+    elif args.summary:
+        if not os.path.isdir(args.summary):
+            print(f"Error summarizing tree: {args.summary} is not a directory")
+        else:
+            summaries, errors = summarize_tree(args.summary, args.top, args.workers)
+            print_summary(summaries, errors)
+
+    elif args.index:
+        try:
+            counts = index_tree(args.index, args.db, args.index_hash, args.hash, args.index_full)
+            print(f"Indexed: {counts['scanned']} directories scanned, {counts['unchanged']} unchanged, "
+                  f"{counts['files']} entries updated, {counts['errors']} errors")
+        except (OSError, sqlite3.Error) as e:
+            print(f"Error indexing tree: {e}")
+
+    elif args.larger_than is not None or args.world_writable:
+        try:
+            out = open(args.output, 'w', newline='') if args.output else sys.stdout
+            try:
+                if args.format == 'csv':
+                    writer = csv.DictWriter(out, fieldnames=INFO_FIELDS)
+                    writer.writeheader()
+                    for fields in query_index(args.db, args.larger_than, args.world_writable):
+                        writer.writerow(fields)
+                else:
+                    for fields in query_index(args.db, args.larger_than, args.world_writable):
+                        out.write(json.dumps(fields) + '\n')
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Error querying index: {e}")
+
+    elif args.watch:
+        try:
+            TreeWatcher(args.watch[0], args.watch[1], args.debounce).run()
+        except KeyboardInterrupt:
+            print("Watch stopped")
+        except (OSError, AttributeError) as e:
+            print(f"Error watching tree: {e}")
+
+    elif args.batch:
+        try:
+            out = open(args.output, 'w') if args.output else sys.stdout
+            try:
+                succeeded, failed = run_batch(args.batch, out, args.workers, args.engine, args.ring_depth)
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+        except OSError as e:
+            print(f"Error running batch: {e}")
+            sys.exit(1)
+        if failed:
+            sys.exit(1)
+
+    elif args.chmod and args.recursive:
+        try:
+            changed, skipped, errors = chmod_tree(args.chmod[0], int(args.chmod[1], 8), args.workers)
+            print(f"Permissions changed: {changed} inodes changed, {skipped} skipped, {len(errors)} errors")
+            for path, error in errors:
+                print(f"  {path}: {error}")
+        except (OSError, ValueError) as e:
+            print(f"Error changing file permissions: {e}")
+
     elif args.chmod:
         if change_permissions(args.chmod[0], args.chmod[1]):
             print("Permissions changed successfully")